@@ -23,5 +23,17 @@ except Exception:
     # no bloquear el arranque si algo falla
     pass
 
+from . import controllers
 from . import models
-from . import wizards
\ No newline at end of file
+from . import wizards
+
+
+def post_init_hook(cr, registry):
+    """Carga inicial del ledger de mecánicos con las facturas ya pagadas y del
+    historial de tasas de los equipos existentes."""
+    from odoo import api, SUPERUSER_ID
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['commission.rate']._seed_team_versions(env['crm.team'].with_context(active_test=False).search([]))
+    env['mechanic.commission.entry']._backfill_ledger()
+    env['mechanic.commission.summary']._rebuild_all()
+    env['commission.salesperson.summary']._rebuild_all()
@@ -9,16 +9,28 @@
 # ╚══════════════════════════════════════════════════════════════════╝
 {
     'name': 'CRM Commission',
-    'version': '16.0.1.0.1',
+    'version': '16.0.1.7.0',
     'summary': 'Permite asignar comisión a los vendedores del CRM',
-    'depends': ['web', 'crm', 'sale', 'hr'],   # <-- agrega 'web'
+    'depends': ['web', 'bus', 'crm', 'sale', 'hr'],   # <-- agrega 'web'
     'data': [
         'security/mechanic_commission_groups.xml',
         'security/ir.model.access.csv',
         'reports/mechanic_commission_report.xml',
         'wizards/mechanic_commission_wizard_view.xml',
+        'views/mechanic_commission_summary_views.xml',
+        'views/mechanic_commission_run_views.xml',
+        'views/commission_entry_views.xml',
+        'reports/mechanic_commission_run_report.xml',
         'views/crm_team_views.xml',
         'views/commission_report_wizard_view.xml',
+        'views/commission_salesperson_summary_views.xml',
+        'views/commission_recompute_job_views.xml',
+        'views/commission_rate_views.xml',
+        'views/commission_report_job_views.xml',
+        'views/commission_batch_run_views.xml',
+        'views/commission_payment_batch_views.xml',
+        'views/commission_profile_views.xml',
+        'data/commission_cron.xml',
         'views/commission_report_pdf.xml',
         'views/sale_order_views.xml',
         'views/account_move_views.xml',
@@ -31,8 +43,10 @@
     'assets': {
         'web.assets_backend': [
             'crm_commission/static/src/css/mechanic_highlight.css',
+            'crm_commission/static/src/js/commission_report_notify.js',
             # 'crm_commission/static/src/js/mechanic_notify.js',
         ],
     },
+    'post_init_hook': 'post_init_hook',
     'installable': True,
 }
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from . import main
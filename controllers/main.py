@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import csv
+import hashlib
+import io
+import tempfile
+
+import xlsxwriter
+from werkzeug.wsgi import wrap_file
+
+from odoo import http
+from odoo.http import request, content_disposition
+
+from ..wizards.commission_report_wizard import EXPORT_COLUMNS
+
+CSV_BUFFER_ROWS = 500
+
+
+class CommissionReportExport(http.Controller):
+
+    @http.route('/crm_commission/commission_report/<int:wizard_id>/export/<string:fmt>',
+                type='http', auth='user')
+    def export_commission_report(self, wizard_id, fmt, **kw):
+        """Exporta el reporte de comisiones a CSV/XLSX sin armar las líneas en memoria.
+
+        Las filas se escriben a un archivo temporal conforme se leen por lotes y la
+        respuesta se envía por bloques desde ese archivo.
+        """
+        wizard = request.env['commission.report.wizard'].browse(wizard_id).exists()
+        if not wizard or fmt not in ('csv', 'xlsx'):
+            return request.not_found()
+        wizard.check_access_rule('read')
+
+        tmp = tempfile.TemporaryFile()
+        if fmt == 'csv':
+            self._write_csv(wizard, tmp)
+            mimetype = 'text/csv;charset=utf-8'
+        else:
+            self._write_xlsx(wizard, tmp)
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        size = tmp.tell()
+        tmp.seek(0)
+
+        headers = [
+            ('Content-Type', mimetype),
+            ('Content-Length', str(size)),
+            ('Content-Disposition', content_disposition(wizard._get_export_filename(fmt))),
+        ]
+        return request.make_response(
+            wrap_file(request.httprequest.environ, tmp),
+            headers=headers,
+        )
+
+    def _write_csv(self, wizard, fileobj):
+        # utf-8-sig para que Excel reconozca los acentos
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='', write_through=True)
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_COLUMNS)
+        buffer = []
+        for row in wizard._iter_export_rows():
+            buffer.append(row)
+            if len(buffer) >= CSV_BUFFER_ROWS:
+                writer.writerows(buffer)
+                buffer = []
+        writer.writerows(buffer)
+        text.flush()
+        # el archivo lo cierra la respuesta, no el wrapper de texto
+        text.detach()
+
+    def _write_xlsx(self, wizard, fileobj):
+        # constant_memory: cada fila se vuelca a disco al pasar a la siguiente
+        workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True})
+        sheet = workbook.add_worksheet('Comisiones')
+        bold = workbook.add_format({'bold': True})
+        money = workbook.add_format({'num_format': '#,##0.00'})
+        sheet.set_column(0, 0, 16)
+        sheet.set_column(1, 1, 12)
+        sheet.set_column(2, 2, 40)
+        sheet.set_column(3, 5, 14, money)
+        sheet.set_column(6, 9, 18)
+        sheet.write_row(0, 0, EXPORT_COLUMNS, bold)
+        for row_idx, row in enumerate(wizard._iter_export_rows(), start=1):
+            sheet.write_row(row_idx, 0, row)
+        workbook.close()
+        fileobj.seek(0, io.SEEK_END)
+
+
+class CommissionDashboardKpi(http.Controller):
+
+    @http.route('/crm_commission/kpis', type='http', auth='user', methods=['GET'])
+    def commission_kpis(self, period=None, company_id=None, **kw):
+        """KPI de vendedores y mecánicos del periodo (``YYYY-MM``) en JSON.
+
+        La respuesta lleva un ETag derivado del estado de los resúmenes en BD (filas y
+        última escritura): si el tablero envía ``If-None-Match`` y nada cambió, se
+        responde 304 sin calcular nada. El cálculo sale de caché por ese mismo estado.
+        """
+        Dashboard = request.env['commission.dashboard']
+        parsed = Dashboard._parse_period(period)
+        company = request.env.company
+        if company_id:
+            if not company_id.isdigit() or int(company_id) not in request.env.user.company_ids.ids:
+                return request.not_found()
+            company = request.env['res.company'].browse(int(company_id))
+        if not parsed or not Dashboard._allowed_sections():
+            return request.not_found()
+
+        state = Dashboard._get_state(company, *parsed)
+        etag = Dashboard._get_etag(company, *parsed, state)
+        # el navegador siempre revalida; el costo de una consulta sin cambios es el 304
+        headers = [('Cache-Control', 'private, no-cache')]
+        if etag and request.httprequest.if_none_match.contains(etag):
+            headers.append(('ETag', '"%s"' % etag))
+            return request.make_response(b'', headers=headers, status=304)
+        body = Dashboard._render_kpis(company, *parsed, state)
+        headers += [
+            ('ETag', '"%s"' % (etag or hashlib.sha1(body).hexdigest())),
+            ('Content-Type', 'application/json; charset=utf-8'),
+        ]
+        return request.make_response(body, headers=headers)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from odoo import api, fields, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Versión inicial del historial de tasas.
+
+    - Equipos: el porcentaje actual vale "desde siempre" (no altera lo ya facturado).
+    - Vendedores con res.users.commission_percent: la excepción aplica desde hoy,
+      porque antes de esta versión nunca se leía.
+    """
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Rate = env['commission.rate']
+    teams = env['crm.team'].with_context(active_test=False).search([('commission_percent', '!=', 0)])
+    Rate.create([{
+        'team_id': team.id,
+        'company_id': team.company_id.id,
+        'percent': team.commission_percent,
+        'date_from': False,
+    } for team in teams])
+    today = fields.Date.today()
+    users = env['res.users'].with_context(active_test=False).search([('commission_percent', '!=', 0)])
+    Rate.create([{
+        'user_id': user.id,
+        'company_id': user.company_id.id,
+        'percent': user.commission_percent,
+        'date_from': today,
+    } for user in users])
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import logging
+
+from odoo.tools import sql
+
+_logger = logging.getLogger(__name__)
+
+# Códigos heredados -> códigos unificados (PAYMENT_METHODS)
+LEGACY_CODES = {'efect': 'efectivo', 'trans': 'transferencia'}
+
+# (tabla, columna) con forma de pago
+PAYMENT_COLUMNS = [
+    ('commission_payment_entry', 'payment_method'),
+    ('mechanic_commission_entry', 'pago_comision'),
+    ('commission_payment_batch', 'payment_method'),
+    ('commission_mass_pay_wizard', 'payment_method'),
+    ('mechanic_commission_mass_pay_wizard', 'pago_comision'),
+]
+
+
+def migrate(cr, version):
+    """Convierte en bloque los códigos 'efect'/'trans' antes de cargar la nueva selección.
+
+    Así el reporte deja de normalizarlos registro por registro al leer.
+    """
+    if not version:
+        return
+    for table, column in PAYMENT_COLUMNS:
+        if not sql.column_exists(cr, table, column):
+            continue
+        cr.execute("""
+            UPDATE {table}
+               SET {column} = CASE {column} WHEN 'efect' THEN %s ELSE %s END
+             WHERE {column} IN ('efect', 'trans')
+        """.format(table=table, column=column), [LEGACY_CODES['efect'], LEGACY_CODES['trans']])
+        if cr.rowcount:
+            _logger.info("crm_commission: %s filas de %s.%s con forma de pago heredada convertidas",
+                         cr.rowcount, table, column)
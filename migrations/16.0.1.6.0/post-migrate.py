@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Equipos sin historial de tasas (al 0 % en la migración 16.0.1.4.0 o creados
+    después): su porcentaje actual vale "desde siempre"."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['commission.rate']._seed_team_versions(env['crm.team'].with_context(active_test=False).search([]))
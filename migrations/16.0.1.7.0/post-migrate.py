@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Quita el cron de limpieza de PDFs de reporte (noupdate, no lo borra la actualización):
+    los adjuntos se eliminan junto con su wizard en el vacuum de transitorios."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cron = env.ref('crm_commission.ir_cron_commission_report_attachment_gc', raise_if_not_found=False)
+    if cron:
+        cron.unlink()
@@ -9,6 +9,9 @@
 # ╚══════════════════════════════════════════════════════════════════╝
 
 from . import crm_team
+from . import commission_rate
+from . import commission_payment_batch
+from . import commission_profile
 from . import sale_commission_user
 from . import sale_order_commission
 from . import account_move_commission
@@ -16,6 +19,14 @@ from . import account_extend
 from . import product_extend
 from . import sale_extend
 from . import mechanic_commission_entry
+from . import mechanic_commission_summary
+from . import mechanic_commission_run
+from . import commission_salesperson_summary
+from . import commission_liability
+from . import commission_dashboard
+from . import commission_recompute_job
+from . import commission_report_job
+from . import commission_batch_run
 from . import sale_order_set_mechanic_wizard
 
 
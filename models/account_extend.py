@@ -9,6 +9,17 @@
 # ╚══════════════════════════════════════════════════════════════════╝
 
 from odoo import models, fields, api
+from odoo.tools import sql
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def _compute_payment_state(self):
+        super()._compute_payment_state()
+        # El ledger de mecánicos se alimenta al cambiar el estado de pago
+        # (también al dejar de estar pagada, para retirar entradas pendientes)
+        self.env["mechanic.commission.entry"]._queue_ledger_sync(self)
+
 
 class AccountMoveLine(models.Model):
     _inherit = "account.move.line"
@@ -40,6 +51,17 @@ class AccountMoveLine(models.Model):
         store=False,
     )
 
+    def init(self):
+        super().init()
+        # Índice parcial: solo líneas con mecánico (la gran mayoría no lo tienen)
+        sql.create_index(
+            self.env.cr,
+            "account_move_line_mechanic_move_idx",
+            self._table,
+            ["mechanic_id", "move_id"],
+            where="mechanic_id IS NOT NULL",
+        )
+
     @api.depends("product_id")
     def _compute_mechanic_meta(self):
         for line in self:
@@ -60,3 +82,10 @@ class AccountMoveLine(models.Model):
                 )
             else:
                 line.mechanic_cost_subtotal = 0.0
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "mechanic_id" in vals:
+            posted = self.filtered(lambda l: l.parent_state == "posted")
+            self.env["mechanic.commission.entry"]._queue_ledger_sync(posted.move_id)
+        return res
@@ -9,6 +9,14 @@
 # ╚══════════════════════════════════════════════════════════════════╝
 
 from odoo import models, fields, api
+from odoo.tools import sql
+
+from .commission_cache import invalidate_salespersons
+
+# Cambios que mueven una factura de periodo/vendedor en el resumen de vendedores
+SUMMARY_KEY_FIELDS = {'invoice_user_id', 'invoice_date', 'company_id', 'state', 'move_type'}
+# Cambios que alteran qué facturas carga commission.report.wizard (caché de resultados)
+REPORT_CACHE_FIELDS = SUMMARY_KEY_FIELDS | {'payment_state'}
 
 class AccountMove(models.Model):
     _inherit = 'account.move'
@@ -25,9 +33,45 @@ class AccountMove(models.Model):
         currency_field='currency_id'
     )
 
-    @api.depends('invoice_user_id', 'amount_untaxed')
+    def init(self):
+        super().init()
+        # Índice parcial del pasivo de comisiones (commission.liability): solo facturas
+        # de cliente pagadas con comisión; el predicado coincide con LIABILITY_INVOICE_WHERE
+        sql.create_index(
+            self.env.cr,
+            'account_move_commission_liability_idx',
+            self._table,
+            ['company_id', 'invoice_user_id', 'invoice_date'],
+            where="move_type = 'out_invoice' AND state = 'posted' AND payment_state = 'paid'"
+                  " AND invoice_user_id IS NOT NULL AND commission_amount <> 0",
+        )
+
+    @api.depends('invoice_user_id', 'amount_untaxed', 'invoice_date')
     def _compute_commission_data(self):
+        Rate = self.env['commission.rate']
         for move in self:
-            percent = move.invoice_user_id.sale_team_id.commission_percent if move.invoice_user_id and move.invoice_user_id.sale_team_id else 0.0
+            # Porcentaje vigente a la fecha de la factura (historial de tasas)
+            percent = Rate._get_percent(move.invoice_user_id, move.invoice_date, move.company_id)
             move.commission_percent = percent
-            move.commission_amount = move.amount_untaxed * (percent / 100.0)
\ No newline at end of file
+            move.commission_amount = move.amount_untaxed * (percent / 100.0)
+        self.env['commission.salesperson.summary']._mark_dirty_moves(self)
+
+    def _compute_payment_state(self):
+        super()._compute_payment_state()
+        self.env['commission.salesperson.summary']._mark_dirty_moves(self)
+        invalidate_salespersons(self.env, self.invoice_user_id.ids)
+
+    def write(self, vals):
+        Summary = self.env['commission.salesperson.summary']
+        moves_key = bool(SUMMARY_KEY_FIELDS.intersection(vals))
+        cache_key = bool(REPORT_CACHE_FIELDS.intersection(vals))
+        if moves_key:
+            Summary._mark_dirty_moves(self)  # periodo/vendedor anterior
+        if cache_key:
+            invalidate_salespersons(self.env, self.invoice_user_id.ids)
+        res = super().write(vals)
+        if moves_key:
+            Summary._mark_dirty_moves(self)
+        if cache_key:
+            invalidate_salespersons(self.env, self.invoice_user_id.ids)
+        return res
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import base64
+import io
+import logging
+import os
+import subprocess
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.addons.base.models.ir_actions_report import _get_wkhtmltopdf_bin
+
+_logger = logging.getLogger(__name__)
+
+REPORT_REF = 'crm_commission.action_commission_report_pdf'
+# Procesos wkhtmltopdf simultáneos (ir.config_parameter); por defecto min(4, CPUs)
+BATCH_WORKERS_PARAM = 'crm_commission.batch_workers'
+
+
+def _to_bytes(content):
+    return content if isinstance(content, bytes) else str(content).encode('utf-8')
+
+
+def _run_wkhtmltopdf(command_args, bodies, header=None, footer=None):
+    """Ejecuta wkhtmltopdf sin tocar el ORM (se llama desde hilos del pool).
+
+    ``bodies``/``header``/``footer`` son el HTML (str/Markup) de ``_prepare_html``.
+    Devuelve (pdf_bytes, segundos).
+    """
+    started = time.monotonic()
+    with tempfile.TemporaryDirectory(prefix='crm_commission_batch_') as tmpdir:
+        command = [_get_wkhtmltopdf_bin()] + list(command_args)
+        for option, content in (('--header-html', header), ('--footer-html', footer)):
+            if content:
+                path = os.path.join(tmpdir, option.strip('-') + '.html')
+                with open(path, 'wb') as f:
+                    f.write(_to_bytes(content))
+                command += [option, path]
+        for i, body in enumerate(bodies):
+            path = os.path.join(tmpdir, 'body_%s.html' % i)
+            with open(path, 'wb') as f:
+                f.write(_to_bytes(body))
+            command.append(path)
+        pdf_path = os.path.join(tmpdir, 'report.pdf')
+        command.append(pdf_path)
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if process.returncode not in (0, 1):
+            raise UserError(_('wkhtmltopdf falló (código %s): %s')
+                            % (process.returncode, process.stderr.decode(errors='replace')[-1000:]))
+        with open(pdf_path, 'rb') as f:
+            return f.read(), time.monotonic() - started
+
+
+class CommissionBatchRun(models.Model):
+    _name = 'commission.batch.run'
+    _description = 'Estados de comisión por equipo (corrida masiva)'
+    _order = 'id desc'
+
+    name = fields.Char(string='Descripción', compute='_compute_name', store=True)
+    team_id = fields.Many2one('crm.team', string='Equipo', help='Vacío: todos los equipos.')
+    date_start = fields.Date(string='Fecha inicio', required=True)
+    date_end = fields.Date(string='Fecha fin', required=True)
+    filter_payment = fields.Selection(
+        [('all', 'Todas'), ('paid', 'Pagadas'), ('unpaid', 'No pagadas')],
+        string='Filtro de pago', default='all', required=True,
+    )
+    company_id = fields.Many2one('res.company', string='Compañía', required=True,
+                                 default=lambda self: self.env.company)
+    state = fields.Selection(
+        [('draft', 'Borrador'), ('done', 'Terminado'), ('failed', 'Error')],
+        string='Estado', default='draft', required=True, readonly=True,
+    )
+    line_ids = fields.One2many('commission.batch.run.line', 'run_id', string='Estados', readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string='ZIP', readonly=True, ondelete='set null')
+    workers = fields.Integer(string='Procesos', readonly=True)
+    duration_collect = fields.Float(string='Consulta (s)', digits=(16, 2), readonly=True)
+    duration_render = fields.Float(string='Render total (s)', digits=(16, 2), readonly=True)
+    duration_total = fields.Float(string='Duración total (s)', digits=(16, 2), readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.depends('team_id', 'date_start', 'date_end')
+    def _compute_name(self):
+        for run in self:
+            run.name = '%s: %s - %s' % (
+                run.team_id.name or _('Todos los equipos'),
+                run.date_start and run.date_start.strftime('%d/%m/%Y') or '',
+                run.date_end and run.date_end.strftime('%d/%m/%Y') or '',
+            )
+
+    @api.constrains('date_start', 'date_end')
+    def _check_dates(self):
+        for run in self:
+            if run.date_start and run.date_end and run.date_end < run.date_start:
+                raise ValidationError(_('La fecha final no puede ser menor que la fecha inicial.'))
+
+    # ----------------- RECOLECCIÓN -----------------
+
+    def _get_users(self):
+        self.ensure_one()
+        domain = [('crm_team_id.company_id', 'in', (False, self.company_id.id))]
+        if self.team_id:
+            domain = [('crm_team_id', '=', self.team_id.id)]
+        return self.env['crm.team.member'].search(domain).user_id
+
+    def _collect_report_data(self, users):
+        """Datos por vendedor con consultas agrupadas: una búsqueda de facturas y una de entradas
+        para todo el equipo (el prefetch lee los campos del lote completo de una vez).
+
+        Las facturas sin ``commission.payment.entry`` se incluyen como no pagadas (no se
+        crean entradas desde la corrida). Devuelve {user_id: data} solo para vendedores con facturas.
+        """
+        self.ensure_one()
+        Move = self.env['account.move']
+        Entry = self.env['commission.payment.entry']
+        Wizard = self.env['commission.report.wizard']
+        Rate = self.env['commission.rate']
+        moves = Move.search([
+            ('move_type', '=', 'out_invoice'),
+            ('state', '=', 'posted'),
+            ('payment_state', '=', 'paid'),
+            ('invoice_user_id', 'in', users.ids),
+            ('invoice_date', '>=', self.date_start),
+            ('invoice_date', '<=', self.date_end),
+            ('company_id', '=', self.company_id.id),
+        ], order='invoice_date asc, name asc')
+        entries = Entry.search([('move_id', 'in', moves.ids), ('salesperson_id', 'in', users.ids)])
+        entry_by_key = {(e.move_id.id, e.salesperson_id.id): e for e in entries}
+
+        pairs_by_user = {}
+        for m in moves:
+            # Sin entrada (nadie abrió el wizard de ese vendedor): la comisión cuenta como no pagada
+            entry = entry_by_key.get((m.id, m.invoice_user_id.id)) or Entry
+            if self.filter_payment == 'paid' and not entry.commission_paid:
+                continue
+            if self.filter_payment == 'unpaid' and entry.commission_paid:
+                continue
+            pairs_by_user.setdefault(m.invoice_user_id.id, []).append((m, entry))
+
+        currency = self.company_id.currency_id
+        result = {}
+        for user in users:
+            pairs = pairs_by_user.get(user.id)
+            if not pairs:
+                continue
+            result[user.id] = Wizard._report_data_from_pairs(
+                pairs, user, self.date_start, self.date_end, self.filter_payment,
+                Rate._get_percent(user, self.date_end, self.company_id), currency,
+            )
+        return result
+
+    # ----------------- RENDER -----------------
+
+    @api.model
+    def _get_max_workers(self):
+        value = self.env['ir.config_parameter'].sudo().get_param(BATCH_WORKERS_PARAM)
+        try:
+            return max(1, int(value))
+        except (TypeError, ValueError):
+            return min(4, os.cpu_count() or 1)
+
+    @api.model
+    def _can_render_in_parallel(self):
+        if tools.config['test_enable'] or tools.config['test_file']:
+            return False
+        return self.env['ir.actions.report'].get_wkhtmltopdf_state() == 'ok'
+
+    def _render_statements(self, data_by_user):
+        """PDF por vendedor: HTML en este hilo (ORM), wkhtmltopdf en un pool acotado de procesos.
+
+        Devuelve {user_id: (pdf_bytes, segundos_html, segundos_pdf)}.
+        """
+        self.ensure_one()
+        Report = self.env['ir.actions.report'].with_context(
+            lang=self.env.user.lang or 'es_MX',
+            no_abbrev=True,
+            discard_logo_check=True,
+        )
+        if not self._can_render_in_parallel():
+            self.workers = 1
+            results = {}
+            for user_id, data in data_by_user.items():
+                started = time.monotonic()
+                pdf_bytes, _ = Report._render_qweb_pdf(REPORT_REF, data=dict(data))
+                results[user_id] = (pdf_bytes, 0.0, time.monotonic() - started)
+            return results
+
+        report = Report._get_report(REPORT_REF)
+        paperformat = report.get_paperformat()
+        prepared = {}
+        for user_id, data in data_by_user.items():
+            started = time.monotonic()
+            html = Report._render_qweb_html(REPORT_REF, [], data=dict(data, report_type='pdf'))[0]
+            bodies, _res_ids, header, footer, specific_args = Report._prepare_html(html, report_model=report.model)
+            command_args = Report._build_wkhtmltopdf_args(
+                paperformat, Report.env.context.get('landscape'),
+                specific_paperformat_args=specific_args,
+                set_viewport_size=Report.env.context.get('set_viewport_size'),
+            )
+            prepared[user_id] = (command_args, bodies, header, footer, time.monotonic() - started)
+
+        self.workers = min(self._get_max_workers(), len(prepared)) or 1
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                user_id: executor.submit(_run_wkhtmltopdf, args, bodies, header, footer)
+                for user_id, (args, bodies, header, footer, _html_time) in prepared.items()
+            }
+            for user_id, future in futures.items():
+                pdf_bytes, pdf_time = future.result()
+                results[user_id] = (pdf_bytes, prepared[user_id][4], pdf_time)
+        return results
+
+    # ----------------- ACCIÓN -----------------
+
+    def action_run(self):
+        self.ensure_one()
+        started = time.monotonic()
+        self.line_ids.unlink()
+        if self.attachment_id:
+            self.attachment_id.unlink()
+
+        users = self._get_users()
+        data_by_user = self._collect_report_data(users)
+        collected = time.monotonic()
+        if not data_by_user:
+            raise UserError(_('No hay facturas en el rango/filtro seleccionado para los vendedores del equipo.'))
+
+        try:
+            results = self._render_statements(data_by_user)
+        except Exception as e:
+            _logger.exception("Corrida de estados de comisión %s falló", self.id)
+            self.write({'state': 'failed', 'error': str(e)})
+            return False
+        rendered = time.monotonic()
+
+        users_by_id = {u.id: u for u in users}
+        buffer = io.BytesIO()
+        line_vals = []
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for user_id, (pdf_bytes, html_time, pdf_time) in results.items():
+                user = users_by_id[user_id]
+                data = data_by_user[user_id]
+                fname = 'comisiones_%s_%s_%s.pdf' % (
+                    (user.name or str(user.id)).replace(' ', '_').replace('/', '-'),
+                    self.date_start, self.date_end,
+                )
+                zf.writestr(fname, pdf_bytes)
+                line_vals.append({
+                    'run_id': self.id,
+                    'user_id': user_id,
+                    'filename': fname,
+                    'invoice_count': len(data['invoice_lines']),
+                    'amount_total': data['amount_total'],
+                    'commission_total': data['commission_total'],
+                    'duration_html': html_time,
+                    'duration_pdf': pdf_time,
+                    'duration': html_time + pdf_time,
+                    'pdf_size': len(pdf_bytes),
+                })
+        self.env['commission.batch.run.line'].create(line_vals)
+
+        attachment = self.env['ir.attachment'].create({
+            'name': 'estados_comisiones_%s_%s.zip' % (self.date_start, self.date_end),
+            'type': 'binary',
+            'datas': base64.b64encode(buffer.getvalue()),
+            'mimetype': 'application/zip',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        self.write({
+            'state': 'done',
+            'attachment_id': attachment.id,
+            'duration_collect': collected - started,
+            'duration_render': rendered - collected,
+            'duration_total': time.monotonic() - started,
+            'error': False,
+        })
+        return self.action_download()
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            return False
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+
+class CommissionBatchRunLine(models.Model):
+    _name = 'commission.batch.run.line'
+    _description = 'Estado de comisión de un vendedor (corrida masiva)'
+    _order = 'duration desc, id'
+
+    run_id = fields.Many2one('commission.batch.run', string='Corrida', required=True, ondelete='cascade', index=True)
+    user_id = fields.Many2one('res.users', string='Vendedor', required=True)
+    filename = fields.Char(string='Archivo')
+    invoice_count = fields.Integer(string='Facturas')
+    amount_total = fields.Float(string='Total Ventas (Base)', digits=(16, 2))
+    commission_total = fields.Float(string='Total Comisión', digits=(16, 2))
+    duration_html = fields.Float(string='HTML (s)', digits=(16, 3))
+    duration_pdf = fields.Float(string='PDF (s)', digits=(16, 3))
+    duration = fields.Float(string='Total (s)', digits=(16, 3))
+    pdf_size = fields.Integer(string='Tamaño (bytes)')
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+"""Caché de resultados de corta vida para las cargas de commission.report.wizard.
+
+Guarda solo IDs (la página visible de la carga interactiva) por
+(base de datos, vendedor, usuario que consulta, compañías permitidas, rango,
+filtro); los importes se leen siempre del ORM.
+Se invalida por vendedor al escribir facturas o entradas de pago y, entre
+procesos, expira por TTL.
+
+El mismo mecanismo guarda los KPI del tablero (``kpi_cache``) por
+(base de datos, compañía, año, mes, firma de los resúmenes en BD): otro proceso
+que recalcule cambia la firma, así que no se sirven KPI viejos; la invalidación
+al recalcular solo libera memoria antes del TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 60        # segundos
+DEFAULT_MAX_ITEMS = 512
+KPI_TTL = 30            # segundos; el tablero sondea cada pocos segundos
+KPI_MAX_ITEMS = 128
+
+
+class CommissionResultCache:
+
+    def __init__(self, ttl=DEFAULT_TTL, max_items=DEFAULT_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def invalidate(self, dbname, ids):
+        """Descarta las llaves de esos ids (key = (dbname, id, ...); vendedor o compañía)."""
+        ids = set(ids)
+        if not ids:
+            return
+        with self._lock:
+            for key in [k for k in self._data if k[0] == dbname and k[1] in ids]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+report_cache = CommissionResultCache()
+kpi_cache = CommissionResultCache(ttl=KPI_TTL, max_items=KPI_MAX_ITEMS)
+
+# Capa por transacción en cr.precommit.data: se publica al caché del proceso solo
+# tras el commit, para no compartir IDs de una transacción que pudiera revertirse.
+TX_CACHE_KEY = 'crm_commission.report_cache'
+
+
+def cache_get(env, key):
+    """``key`` = (vendedor, ...) ; None si no hay valor vigente."""
+    full_key = (env.cr.dbname,) + tuple(key)
+    tx_layer = env.cr.precommit.data.get(TX_CACHE_KEY)
+    if tx_layer and full_key in tx_layer:
+        return tx_layer[full_key]
+    return report_cache.get(full_key)
+
+
+def cache_set(env, key, value):
+    full_key = (env.cr.dbname,) + tuple(key)
+    env.cr.precommit.data.setdefault(TX_CACHE_KEY, {})[full_key] = value
+    env.cr.postcommit.add(lambda: report_cache.set(full_key, value))
+
+
+def invalidate_salespersons(env, user_ids):
+    user_ids = {uid for uid in user_ids if uid}
+    if not user_ids:
+        return
+    dbname = env.cr.dbname
+    tx_layer = env.cr.precommit.data.get(TX_CACHE_KEY)
+    if tx_layer:
+        for key in [k for k in tx_layer if k[1] in user_ids]:
+            del tx_layer[key]
+    report_cache.invalidate(dbname, user_ids)
+    # otros requests del proceso pudieron cachear antes de que esta transacción confirme
+    env.cr.postcommit.add(lambda: report_cache.invalidate(dbname, user_ids))
+
+
+def invalidate_kpis(env, company_ids):
+    company_ids = {cid for cid in company_ids if cid}
+    if not company_ids:
+        return
+    dbname = env.cr.dbname
+    kpi_cache.invalidate(dbname, company_ids)
+    env.cr.postcommit.add(lambda: kpi_cache.invalidate(dbname, company_ids))
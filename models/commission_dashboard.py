@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import hashlib
+import json
+
+from odoo import models, fields, api
+
+from .commission_cache import kpi_cache
+
+TOP_N = 5
+
+# Campos sumados por sección (mismos nombres en el JSON)
+SALESPERSON_MEASURES = [
+    'invoice_count', 'invoice_paid_count', 'amount_base', 'commission_total', 'commission_paid',
+]
+MECHANIC_MEASURES = [
+    'services_count', 'services_paid_count', 'hours', 'amount_invoiced', 'payout', 'payout_paid',
+]
+
+# Sección -> (modelo del resumen, campo agrupador, medidas, medida total, medida pagada)
+DASHBOARD_SECTIONS = {
+    'salespersons': ('commission.salesperson.summary', 'user_id', SALESPERSON_MEASURES,
+                     'commission_total', 'commission_paid'),
+    'mechanics': ('mechanic.commission.summary', 'employee_id', MECHANIC_MEASURES,
+                  'payout', 'payout_paid'),
+}
+
+
+class CommissionDashboard(models.AbstractModel):
+    _name = 'commission.dashboard'
+    _description = 'KPI de comisiones para tableros'
+
+    @api.model
+    def _allowed_sections(self):
+        return [
+            section for section, (model, *_rest) in DASHBOARD_SECTIONS.items()
+            if self.env[model].check_access_rights('read', raise_exception=False)
+        ]
+
+    @api.model
+    def _get_state(self, company, year, month):
+        """Firma del periodo en BD: (filas, última escritura) de cada resumen.
+
+        None si hay periodos en la cola de esta transacción (aún sin recalcular):
+        entonces no se usa caché ni ETag por estado.
+        """
+        state = []
+        for model_name, *_rest in DASHBOARD_SECTIONS.values():
+            Summary = self.env[model_name].sudo()
+            if Summary._has_pending(company, year, month):
+                return None
+            Summary.flush_model()
+            self.env.cr.execute("""
+                SELECT count(*), max(write_date) FROM %s
+                 WHERE company_id = %%s AND year = %%s AND month = %%s
+            """ % Summary._table, [company.id, year, month])
+            state.append(tuple(self.env.cr.fetchone()))
+        return tuple(state)
+
+    @api.model
+    def _get_etag(self, company, year, month, state):
+        """ETag (sin comillas) derivado del estado en BD y de las secciones visibles; None sin estado."""
+        if state is None:
+            return None
+        raw = json.dumps(
+            [company.id, company.currency_id.id, year, month, state, self._allowed_sections()],
+            default=str,
+        )
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    @api.model
+    def _get_kpis(self, company, year, month, state=None):
+        """KPI de compañía-periodo desde caché (TTL corto) o desde los resúmenes mensuales.
+
+        La caché es compartida entre usuarios: se calcula como superusuario y el
+        controlador filtra las secciones según los permisos de quien consulta. La
+        llave lleva la firma del estado en BD: un worker que no vio la escritura no
+        puede servir KPI viejos, solo recalcula.
+        """
+        if state is None:
+            return self.sudo()._compute_kpis(company, year, month)
+        key = (self.env.cr.dbname, company.id, year, month, state)
+        payload = kpi_cache.get(key)
+        if payload is None:
+            payload = self.sudo()._compute_kpis(company, year, month)
+            kpi_cache.set(key, payload)
+        return payload
+
+    @api.model
+    def _compute_kpis(self, company, year, month):
+        payload = {
+            'company_id': company.id,
+            'currency': company.currency_id.name,
+            'period': '%s-%s' % (year, month),
+        }
+        for section in DASHBOARD_SECTIONS:
+            payload[section] = self._compute_section(section, company, year, month)
+        return payload
+
+    @api.model
+    def _compute_section(self, section, company, year, month):
+        """Totales del periodo y los TOP_N con más comisión: una consulta agrupada por resumen.
+
+        Solo lectura: si el periodo está en la cola de esta transacción se agrega el
+        origen (facturas / ledger) en lugar de recalcular los resúmenes.
+        """
+        model_name, group_field, measures, total_field, paid_field = DASHBOARD_SECTIONS[section]
+        Summary = self.env[model_name]
+        if Summary._has_pending(company, year, month):
+            values = Summary._aggregate_period(company, year, month)
+            records = self.env[Summary._fields[group_field].comodel_name].sudo().browse(list(values))
+            names = dict(zip(records.ids, records.mapped('display_name')))
+            groups = sorted((
+                dict(vals, **{group_field: (group_id, names.get(group_id, ''))})
+                for group_id, vals in values.items()
+            ), key=lambda g: g[total_field] or 0, reverse=True)
+        else:
+            groups = Summary.read_group(
+                [('company_id', '=', company.id), ('year', '=', year), ('month', '=', month)],
+                ['%s:sum' % fname for fname in measures],
+                [group_field],
+                orderby='%s desc' % total_field,
+                lazy=False,
+            )
+        totals = {fname: sum(g[fname] or 0 for g in groups) for fname in measures}
+        totals['unpaid'] = totals[total_field] - totals[paid_field]
+        totals['top'] = [{
+            'id': g[group_field][0],
+            'name': g[group_field][1],
+            'total': g[total_field] or 0,
+            'paid': g[paid_field] or 0,
+        } for g in groups[:TOP_N] if g[group_field]]
+        return totals
+
+    @api.model
+    def _render_kpis(self, company, year, month, state=None):
+        """Cuerpo JSON con las secciones visibles para el usuario actual."""
+        payload = dict(self._get_kpis(company, year, month, state))
+        allowed = self._allowed_sections()
+        for section in DASHBOARD_SECTIONS:
+            if section not in allowed:
+                payload.pop(section)
+        return json.dumps(payload, sort_keys=True, default=str).encode()
+
+    @api.model
+    def _parse_period(self, period=None):
+        """'YYYY-MM' -> ('YYYY', 'MM'); mes actual si viene vacío. None si es inválido."""
+        if not period:
+            today = fields.Date.context_today(self)
+            return today.strftime('%Y'), today.strftime('%m')
+        year, _sep, month = period.partition('-')
+        if len(year) != 4 or len(month) != 2 or not (year + month).isdigit() or not 1 <= int(month) <= 12:
+            return None
+        return year, month
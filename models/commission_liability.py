@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from datetime import datetime, time, timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError
+
+# Facturas que generan comisión de vendedor; debe coincidir con el predicado del
+# índice parcial account_move_commission_liability_idx para que el planner lo use.
+LIABILITY_INVOICE_WHERE = """
+    am.move_type = 'out_invoice'
+    AND am.state = 'posted'
+    AND am.payment_state = 'paid'
+    AND am.invoice_user_id IS NOT NULL
+    AND am.commission_amount <> 0
+"""
+
+
+class CommissionLiability(models.AbstractModel):
+    _name = 'commission.liability'
+    _description = 'Comisiones pendientes de pago (pasivo)'
+
+    @api.model
+    def get_outstanding(self, as_of=None, company_id=None):
+        """Comisión pendiente de pago por vendedor y por mecánico a la fecha ``as_of``.
+
+        Cuenta lo devengado con factura hasta ``as_of`` que a esa fecha no se había
+        pagado (sin pagar hoy, o pagado después de ``as_of``). Del lado de vendedores
+        incluye las facturas que aún no tienen registro en ``commission.payment.entry``
+        (nadie abrió el wizard para ese vendedor).
+        Dos consultas agrupadas sobre índices parciales; sin leer registros.
+        Solo compañías permitidas del usuario (el SQL no aplica reglas de registro).
+        """
+        as_of = fields.Date.to_date(as_of) or fields.Date.context_today(self)
+        if company_id and company_id not in self.env.companies.ids:
+            raise AccessError(_('No tiene acceso a la compañía indicada.'))
+        company = self.env['res.company'].browse(company_id) if company_id else self.env.company
+
+        # Pagos sellados desde el día siguiente a as_of (UTC, como se guardan) aún no cuentan
+        paid_before = datetime.combine(as_of + timedelta(days=1), time.min)
+        salespersons = self._outstanding_salespersons(as_of, company, paid_before)
+        mechanics = self._outstanding_mechanics(as_of, company, paid_before)
+        salesperson_total = sum(r['amount'] for r in salespersons)
+        mechanic_total = sum(r['amount'] for r in mechanics)
+        return {
+            'as_of': fields.Date.to_string(as_of),
+            'company_id': company.id,
+            'currency_id': company.currency_id.id,
+            'salespersons': salespersons,
+            'mechanics': mechanics,
+            'salesperson_total': salesperson_total,
+            'mechanic_total': mechanic_total,
+            'total': salesperson_total + mechanic_total,
+        }
+
+    @api.model
+    def _outstanding_salespersons(self, as_of, company, paid_before):
+        if not self.env['commission.payment.entry'].check_access_rights('read', raise_exception=False):
+            return []
+        self.env['account.move'].flush_model([
+            'move_type', 'state', 'payment_state', 'invoice_user_id', 'invoice_date',
+            'company_id', 'commission_amount',
+        ])
+        self.env['commission.payment.entry'].flush_model([
+            'move_id', 'salesperson_id', 'commission_paid', 'payment_datetime',
+        ])
+        # Pendiente = factura pagada sin entrada pagada antes del corte (exista o no la entrada);
+        # un pago sin sello de fecha cuenta como anterior
+        self.env.cr.execute("""
+            SELECT am.invoice_user_id, count(*), COALESCE(sum(am.commission_amount), 0)
+              FROM account_move am
+             WHERE %s
+               AND am.company_id = %%s
+               AND am.invoice_date <= %%s
+               AND NOT EXISTS (
+                       SELECT 1
+                         FROM commission_payment_entry cpe
+                        WHERE cpe.move_id = am.id
+                          AND cpe.salesperson_id = am.invoice_user_id
+                          AND cpe.commission_paid
+                          AND (cpe.payment_datetime IS NULL OR cpe.payment_datetime < %%s)
+                   )
+          GROUP BY am.invoice_user_id
+          ORDER BY 3 DESC
+        """ % LIABILITY_INVOICE_WHERE, [company.id, as_of, paid_before])
+        rows = self.env.cr.fetchall()
+        users = self.env['res.users'].sudo().browse([row[0] for row in rows])
+        names = dict(zip(users.ids, users.mapped('name')))
+        return [{
+            'user_id': user_id,
+            'name': names.get(user_id, ''),
+            'invoice_count': count,
+            'amount': amount,
+        } for user_id, count, amount in rows]
+
+    @api.model
+    def _outstanding_mechanics(self, as_of, company, paid_before):
+        Entry = self.env['mechanic.commission.entry']
+        if not Entry.check_access_rights('read', raise_exception=False):
+            return []
+        # Solo lectura (se llama desde GET): la cola del ledger se procesa en precommit
+        Entry.flush_model(['company_id', 'employee_id', 'invoice_date', 'is_paid', 'paid_date', 'hours', 'payout'])
+        # "is_paid IS NOT TRUE" es el predicado de mechanic_commission_entry_unpaid_idx; solo
+        # un corte en el pasado necesita además lo pagado después (pago sin sello = anterior)
+        outstanding = "is_paid IS NOT TRUE"
+        params = []
+        if paid_before <= fields.Datetime.now():
+            outstanding = "(is_paid IS NOT TRUE OR paid_date >= %s)"
+            params.append(paid_before)
+        self.env.cr.execute("""
+            SELECT employee_id, count(*), COALESCE(sum(hours), 0), COALESCE(sum(payout), 0)
+              FROM mechanic_commission_entry
+             WHERE %s
+               AND company_id = %%s
+               AND invoice_date <= %%s
+          GROUP BY employee_id
+          ORDER BY 4 DESC
+        """ % outstanding, params + [company.id, as_of])
+        rows = self.env.cr.fetchall()
+        employees = self.env['hr.employee'].sudo().browse([row[0] for row in rows])
+        names = dict(zip(employees.ids, employees.mapped('name')))
+        return [{
+            'employee_id': employee_id,
+            'name': names.get(employee_id, ''),
+            'services_count': count,
+            'hours': hours,
+            'amount': amount,
+        } for employee_id, count, hours, amount in rows]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+# Formas de pago de comisión (vendedores y mecánicos)
+PAYMENT_METHODS = [
+    ('efectivo', 'Efectivo'),
+    ('transferencia', 'Transferencia'),
+]
+
+BATCH_KINDS = [
+    ('salesperson', 'Vendedores'),
+    ('mechanic', 'Mecánicos'),
+]
+
+
+class CommissionPaymentBatch(models.Model):
+    """Bitácora de pagos masivos: una fila por lote, solo inserción."""
+    _name = 'commission.payment.batch'
+    _description = 'Lote de pago de comisiones (bitácora)'
+    _order = 'id desc'
+
+    kind = fields.Selection(BATCH_KINDS, string='Tipo', required=True, readonly=True)
+    payment_method = fields.Selection(PAYMENT_METHODS, string='Forma de pago', readonly=True)
+    payment_datetime = fields.Datetime(string='Fecha/Hora pago', readonly=True)
+    user_id = fields.Many2one('res.users', string='Registró', readonly=True)
+    note = fields.Char(string='Nota', readonly=True)
+    requested_count = fields.Integer(string='Solicitadas', readonly=True)
+    entry_count = fields.Integer(string='Pagadas', readonly=True,
+                                 help='Entradas que estaban pendientes y se marcaron en este lote.')
+    amount_total = fields.Float(string='Importe', digits=(16, 2), readonly=True)
+    entry_ids = fields.Json(string='IDs de entradas', readonly=True)
+
+    def write(self, vals):
+        raise UserError(_('La bitácora de pagos de comisión no se puede modificar.'))
+
+    def unlink(self):
+        raise UserError(_('La bitácora de pagos de comisión no se puede eliminar.'))
+
+    @api.model
+    def _log(self, kind, requested_count, entry_ids, amount_total, payment_method, payment_datetime, note=None):
+        return self.sudo().create({
+            'kind': kind,
+            'payment_method': payment_method,
+            'payment_datetime': payment_datetime,
+            'user_id': self.env.user.id,
+            'note': note or False,
+            'requested_count': requested_count,
+            'entry_count': len(entry_ids),
+            'amount_total': amount_total,
+            'entry_ids': list(entry_ids),
+        })
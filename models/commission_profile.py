@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import functools
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+# Días que se conservan las mediciones (limpieza con el autovacuum de Odoo)
+PROFILE_LOG_DAYS = 14
+# Llave en cr.precommit.data con las mediciones pendientes de guardar
+PROFILE_QUEUE_KEY = 'crm_commission.profile_logs'
+
+_profile_state = threading.local()
+
+
+def _sql_time():
+    # Odoo acumula el tiempo SQL por hilo en peticiones HTTP y crons; en otros hilos no existe
+    return getattr(threading.current_thread(), 'query_time', None)
+
+
+def profiled(method):
+    """Mide una llamada (consultas SQL, tiempo SQL, tiempo Python y registros) cuando
+    el usuario tiene activo el perfilado de comisiones.
+
+    Va directamente sobre el ``def``, debajo de ``@api.depends``/``@api.onchange``/
+    ``@api.model_create_multi``. Con el perfilado apagado solo cuesta una búsqueda
+    en ormcache.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        Log = self.env['commission.profile.log']
+        if not Log._profiling_enabled(self.env.uid):
+            return method(self, *args, **kwargs)
+
+        depth = getattr(_profile_state, 'depth', 0)
+        if not depth:
+            _profile_state.pending = []
+        _profile_state.depth = depth + 1
+        cr = self.env.cr
+        queries_before = cr.sql_log_count
+        sql_before = _sql_time()
+        started = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            _profile_state.depth = depth
+        duration = time.perf_counter() - started
+        sql_after = _sql_time()
+        sql_time = (sql_after - sql_before) if sql_before is not None and sql_after is not None else 0.0
+
+        _profile_state.pending.append({
+            'name': '%s.%s' % (self._name, method.__name__),
+            'model': self._name,
+            'method': method.__name__,
+            'depth': depth,
+            'duration_ms': duration * 1000,
+            'sql_count': cr.sql_log_count - queries_before,
+            'sql_ms': sql_time * 1000,
+            'python_ms': max(duration - sql_time, 0.0) * 1000,
+            'record_count': len(self),
+            'result_count': len(result) if isinstance(result, (models.BaseModel, list, tuple)) else 0,
+        })
+        if not depth:
+            Log._record(_profile_state.pending)
+            _profile_state.pending = []
+        return result
+    return wrapper
+
+
+class CommissionProfileLog(models.Model):
+    _name = 'commission.profile.log'
+    _description = 'Perfilado de llamadas de comisiones'
+    _order = 'duration_ms desc, id desc'
+    _log_access = False
+
+    name = fields.Char(string='Llamada', required=True, index=True)
+    model = fields.Char(string='Modelo')
+    method = fields.Char(string='Método')
+    user_id = fields.Many2one('res.users', string='Usuario', index=True, ondelete='cascade')
+    date = fields.Datetime(string='Fecha', default=fields.Datetime.now, index=True)
+    depth = fields.Integer(string='Nivel', help='0 = llamada hecha por el cliente; >0 = anidada.')
+    duration_ms = fields.Float(string='Total (ms)', digits=(16, 1), group_operator='max')
+    sql_count = fields.Integer(string='Consultas SQL', group_operator='max')
+    sql_ms = fields.Float(string='SQL (ms)', digits=(16, 1), group_operator='max')
+    python_ms = fields.Float(string='Python (ms)', digits=(16, 1), group_operator='max')
+    record_count = fields.Integer(string='Registros', help='Tamaño del recordset sobre el que se llamó.')
+    result_count = fields.Integer(string='Resultado', help='Registros/elementos devueltos.')
+
+    @api.model
+    @tools.ormcache('uid')
+    def _profiling_enabled(self, uid):
+        return bool(self.env['res.users'].sudo().browse(uid).commission_profiling)
+
+    @api.model
+    def _record(self, vals_list):
+        """Escribe al log del servidor y encola las filas para el final de la transacción
+        (no se crean registros dentro de un compute ni cuentan en la llamada medida)."""
+        for vals in vals_list:
+            vals['user_id'] = self.env.uid
+            _logger.info(
+                "commission profile %(name)s: %(duration_ms).1f ms, %(sql_count)s consultas "
+                "(%(sql_ms).1f ms SQL, %(python_ms).1f ms Python), %(record_count)s registros",
+                vals,
+            )
+        pending = self.env.cr.precommit.data.setdefault(PROFILE_QUEUE_KEY, [])
+        if not pending:
+            self.env.cr.precommit.add(self.sudo()._flush_pending)
+        pending.extend(vals_list)
+
+    @api.model
+    def _flush_pending(self):
+        # Si la transacción se revierte, la medición solo queda en el log del servidor
+        vals_list = self.env.cr.precommit.data.pop(PROFILE_QUEUE_KEY, None)
+        if vals_list:
+            self.sudo().create(vals_list)
+            self.flush_model()
+
+    @api.autovacuum
+    def _gc_old_logs(self):
+        limit = fields.Datetime.now() - timedelta(days=PROFILE_LOG_DAYS)
+        self.sudo().search([('date', '<', limit)]).unlink()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import bisect
+from datetime import date, timedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+
+# Llave en cr.precommit.data: índice de intervalos cargado una vez por transacción
+RATE_INDEX_KEY = 'crm_commission.rate_index'
+
+
+class CommissionRate(models.Model):
+    _name = 'commission.rate'
+    _description = 'Historial de porcentajes de comisión'
+    _order = 'date_from desc, id desc'
+
+    team_id = fields.Many2one('crm.team', string='Equipo', ondelete='cascade', index=True)
+    user_id = fields.Many2one('res.users', string='Vendedor (excepción)', ondelete='cascade', index=True,
+                              help='Si se indica, este porcentaje sustituye al del equipo para el vendedor.')
+    company_id = fields.Many2one('res.company', string='Compañía', default=lambda self: self.env.company)
+    percent = fields.Float(string='Comisión (%)', digits=(16, 2), required=True)
+    date_from = fields.Date(string='Vigente desde', help='Vacío: desde siempre.')
+    date_to = fields.Date(string='Vigente hasta', help='Vacío: sin fecha de término.')
+
+    @api.constrains('team_id', 'user_id', 'date_from', 'date_to')
+    def _check_interval(self):
+        for rate in self:
+            if bool(rate.team_id) == bool(rate.user_id):
+                raise ValidationError(_('Indique un equipo o un vendedor (solo uno).'))
+            if rate.date_from and rate.date_to and rate.date_to < rate.date_from:
+                raise ValidationError(_('La fecha final no puede ser menor que la fecha inicial.'))
+            domain = [
+                ('id', '!=', rate.id),
+                ('team_id', '=', rate.team_id.id),
+                ('user_id', '=', rate.user_id.id),
+                ('company_id', '=', rate.company_id.id),
+            ]
+            if rate.date_to:
+                domain += ['|', ('date_from', '=', False), ('date_from', '<=', rate.date_to)]
+            if rate.date_from:
+                domain += ['|', ('date_to', '=', False), ('date_to', '>=', rate.date_from)]
+            if self.search_count(domain):
+                raise ValidationError(_('Los periodos de vigencia no pueden traslaparse.'))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rates = super().create(vals_list)
+        self._invalidate_rate_index()
+        return rates
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._invalidate_rate_index()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._invalidate_rate_index()
+        return res
+
+    # ----------------- VERSIONADO -----------------
+
+    @api.model
+    def _record_version(self, percent, team=None, user=None, date_from=None, previous_percent=None):
+        """Cierra la versión vigente y abre una nueva a partir de ``date_from`` (hoy por defecto).
+
+        Si el equipo no tiene versión vigente (instalación nueva, equipo sin historial)
+        primero se registra ``previous_percent`` hasta el día anterior: sin ella, lo
+        facturado antes tomaría el porcentaje nuevo. Para vendedores, un porcentaje 0
+        solo cierra la excepción vigente.
+        """
+        date_from = date_from or fields.Date.context_today(self)
+        company_id = team.company_id.id if team else self.env.company.id
+        if team:
+            domain = [('team_id', '=', team.id), ('user_id', '=', False), ('company_id', '=', company_id)]
+        else:
+            domain = [('user_id', '=', user.id), ('team_id', '=', False), ('company_id', '=', company_id)]
+        current = self.search(domain + [('date_to', '=', False)])
+        if team and not current and previous_percent is not None:
+            last = self.search(domain, order='date_to desc', limit=1)
+            start = last.date_to + timedelta(days=1) if last else False
+            if not start or start < date_from:
+                self.create({
+                    'team_id': team.id,
+                    'company_id': company_id,
+                    'percent': previous_percent,
+                    'date_from': start,
+                    'date_to': date_from - timedelta(days=1),
+                })
+        for rate in current:
+            if rate.date_from and rate.date_from >= date_from:
+                # misma fecha: se corrige la versión en lugar de crear otra
+                rate.unlink()
+            else:
+                rate.date_to = date_from - timedelta(days=1)
+        if user and not percent:
+            return self.browse()
+        return self.create({
+            'team_id': team.id if team else False,
+            'user_id': user.id if user else False,
+            'company_id': company_id,
+            'percent': percent,
+            'date_from': date_from,
+        })
+
+    @api.model
+    def _seed_team_versions(self, teams):
+        """Versión "desde siempre" con el porcentaje actual para equipos sin historial."""
+        teams = teams.with_context(active_test=False)
+        with_history = set(self.search([('team_id', 'in', teams.ids)]).mapped('team_id').ids)
+        missing = teams.filtered(lambda t: t.id not in with_history)
+        return self.create([{
+            'team_id': team.id,
+            'company_id': team.company_id.id,
+            'percent': team.commission_percent,
+            'date_from': False,
+        } for team in missing])
+
+    # ----------------- RESOLUCIÓN "A LA FECHA" -----------------
+
+    @api.model
+    def _invalidate_rate_index(self):
+        self.env.cr.precommit.data.pop(RATE_INDEX_KEY, None)
+
+    @api.model
+    def _get_rate_index(self):
+        """Índice {llave: (inicios ordenados, intervalos)} cargado una vez por transacción."""
+        index = self.env.cr.precommit.data.get(RATE_INDEX_KEY)
+        if index is not None:
+            return index
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT team_id, user_id, company_id, percent, date_from, date_to
+              FROM commission_rate
+          ORDER BY date_from NULLS FIRST
+        """)
+        grouped = {}
+        for team_id, user_id, company_id, percent, date_from, date_to in self.env.cr.fetchall():
+            key = ('team', team_id) if team_id else ('user', user_id, company_id)
+            grouped.setdefault(key, []).append((date_from or date.min, date_to or date.max, percent))
+        index = {key: ([i[0] for i in intervals], intervals) for key, intervals in grouped.items()}
+        self.env.cr.precommit.data[RATE_INDEX_KEY] = index
+        return index
+
+    @api.model
+    def _lookup(self, key, on_date):
+        """Porcentaje vigente en ``on_date`` para ``key`` o None (búsqueda binaria)."""
+        entry = self._get_rate_index().get(key)
+        if not entry:
+            return None
+        starts, intervals = entry
+        pos = bisect.bisect_right(starts, on_date) - 1
+        if pos < 0:
+            return None
+        _start, end, percent = intervals[pos]
+        return percent if on_date <= end else None
+
+    @api.model
+    @tools.ormcache('user_id', 'company_id')
+    def _get_user_rate_source(self, user_id, company_id):
+        """(equipo, % actual del equipo) de un vendedor en una compañía.
+
+        Memoizado con ormcache: evita recorrer usuario -> equipo -> porcentaje por cada
+        factura/pedido. Se invalida con ``_clear_rate_cache`` (cambios de porcentaje
+        o de miembros del equipo).
+        """
+        team = self.env['res.users'].sudo().with_company(company_id).browse(user_id).sale_team_id
+        return team.id or False, team.commission_percent or 0.0
+
+    @api.model
+    def _clear_rate_cache(self):
+        self.clear_caches()
+
+    @api.model
+    def _get_percent(self, user, on_date=None, company=None):
+        """Porcentaje de comisión de ``user`` vigente en ``on_date``.
+
+        Prioridad: excepción del vendedor > historial del equipo > porcentaje actual del equipo.
+        Compartido por facturas y pedidos.
+        """
+        if not user:
+            return 0.0
+        on_date = on_date or fields.Date.context_today(self)
+        company = company or self.env.company
+        percent = self._lookup(('user', user.id, company.id), on_date)
+        if percent is not None:
+            return percent
+        team_id, team_percent = self._get_user_rate_source(user.id, company.id)
+        if not team_id:
+            return 0.0
+        percent = self._lookup(('team', team_id), on_date)
+        if percent is not None:
+            return percent
+        return team_percent
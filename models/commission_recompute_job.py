@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import logging
+import threading
+import time
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Fase -> (modelo, campo vendedor, campo fecha, campos de comisión almacenados)
+RECOMPUTE_PHASES = {
+    'move': ('account.move', 'invoice_user_id', 'invoice_date',
+             ['commission_percent', 'commission_amount']),
+    'order': ('sale.order', 'user_id', 'date_order',
+              ['seller_name', 'commission_percent', 'commission_amount']),
+}
+
+
+class CommissionRecomputeJob(models.Model):
+    _name = 'commission.recompute.job'
+    _description = 'Recalculo por lotes de comisiones almacenadas'
+    _order = 'id desc'
+
+    name = fields.Char(string='Descripción', required=True)
+    team_id = fields.Many2one('crm.team', string='Equipo', ondelete='cascade', index=True)
+    user_id = fields.Many2one('res.users', string='Vendedor', ondelete='cascade', index=True)
+    date_from = fields.Date(string='Desde', help='Solo documentos con fecha igual o posterior (vacío: todos).')
+    state = fields.Selection(
+        [('pending', 'Pendiente'), ('running', 'En proceso'), ('done', 'Terminado'), ('failed', 'Error')],
+        string='Estado', default='pending', required=True, index=True,
+    )
+    phase = fields.Selection(
+        [('move', 'Facturas'), ('order', 'Pedidos de venta'), ('done', 'Terminado')],
+        string='Fase', default='move', required=True,
+    )
+    chunk_size = fields.Integer(string='Tamaño de lote', default=500)
+    # Cursor para reanudar: último id procesado de la fase actual
+    last_id = fields.Integer(string='Último ID procesado', default=0)
+    total_count = fields.Integer(string='Total a recalcular')
+    processed_count = fields.Integer(string='Procesados', default=0)
+    progress = fields.Float(string='Progreso (%)', compute='_compute_progress')
+    date_start = fields.Datetime(string='Inicio')
+    date_end = fields.Datetime(string='Fin')
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.depends('processed_count', 'total_count', 'state')
+    def _compute_progress(self):
+        for job in self:
+            if job.state == 'done':
+                job.progress = 100.0
+            elif job.total_count:
+                job.progress = min(100.0, 100.0 * job.processed_count / job.total_count)
+            else:
+                job.progress = 0.0
+
+    # ----------------- ALTA DE TRABAJOS -----------------
+
+    def _team_users(self):
+        self.ensure_one()
+        if self.user_id:
+            return self.user_id
+        return self.env['res.users'].with_context(active_test=False).search([
+            ('sale_team_id', '=', self.team_id.id),
+        ])
+
+    def _phase_domain(self, phase, users, after_id=0):
+        self.ensure_one()
+        _model, user_field, date_field, _fnames = RECOMPUTE_PHASES[phase]
+        domain = [(user_field, 'in', users.ids), ('id', '>', after_id)]
+        if self.date_from:
+            domain.append((date_field, '>=', self.date_from))
+        if phase == 'move':
+            domain.append(('move_type', 'in', ('out_invoice', 'out_refund')))
+        return domain
+
+    def _count_total(self):
+        self.ensure_one()
+        users = self._team_users()
+        return sum(
+            self.env[RECOMPUTE_PHASES[phase][0]].search_count(self._phase_domain(phase, users))
+            for phase in RECOMPUTE_PHASES
+        )
+
+    @api.model
+    def _enqueue_for_teams(self, teams, date_from=None):
+        """Crea (o reinicia) un trabajo por equipo cuyo porcentaje cambió."""
+        for team in teams:
+            self._enqueue('team_id', team, date_from)
+        self._trigger_cron()
+
+    @api.model
+    def _enqueue_for_users(self, users, date_from=None):
+        """Crea (o reinicia) un trabajo por vendedor cuya excepción cambió."""
+        for user in users:
+            self._enqueue('user_id', user, date_from)
+        self._trigger_cron()
+
+    @api.model
+    def _enqueue(self, target_field, target, date_from):
+        job = self.search([(target_field, '=', target.id), ('state', 'in', ('pending', 'running'))], limit=1)
+        if job:
+            job.write({
+                'state': 'pending', 'phase': 'move', 'last_id': 0, 'processed_count': 0,
+                # el rango pendiente se amplía si ya había un cambio anterior sin terminar
+                'date_from': job.date_from and date_from and min(job.date_from, date_from),
+            })
+        else:
+            job = self.create({
+                'name': 'Recalcular comisiones: %s' % target.display_name,
+                target_field: target.id,
+                'date_from': date_from,
+            })
+        job.total_count = job._count_total()
+
+    @api.model
+    def _trigger_cron(self):
+        cron = self.env.ref('crm_commission.ir_cron_commission_recompute_jobs', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    # ----------------- EJECUCIÓN -----------------
+
+    def _process_chunk(self):
+        """Recalcula un lote de la fase actual. Devuelve False si el trabajo terminó."""
+        self.ensure_one()
+        if self.phase == 'done':
+            return False
+        model_name, _user_field, _date_field, fnames = RECOMPUTE_PHASES[self.phase]
+        Model = self.env[model_name]
+        ids = list(Model._search(
+            self._phase_domain(self.phase, self._team_users(), after_id=self.last_id),
+            order='id', limit=self.chunk_size or 500,
+        ))
+        if not ids:
+            next_phase = 'order' if self.phase == 'move' else 'done'
+            self.write({'phase': next_phase, 'last_id': 0})
+            if next_phase == 'done':
+                self.write({'state': 'done', 'date_end': fields.Datetime.now()})
+                return False
+            return True
+
+        records = Model.browse(ids)
+        for fname in fnames:
+            self.env.add_to_compute(Model._fields[fname], records)
+        records.flush_recordset()
+        self.write({
+            'last_id': max(ids),
+            'processed_count': self.processed_count + len(ids),
+        })
+        return True
+
+    def _run(self, time_budget=None):
+        """Procesa el trabajo en lotes con commit entre cada uno (reanudable)."""
+        testing = getattr(threading.current_thread(), 'testing', False)
+        deadline = time.monotonic() + time_budget if time_budget else None
+        for job in self:
+            if job.state not in ('pending', 'running'):
+                continue
+            job.write({'state': 'running', 'date_start': job.date_start or fields.Datetime.now()})
+            try:
+                while job._process_chunk():
+                    if not testing:
+                        self.env.cr.commit()
+                    self.env.invalidate_all()
+                    if deadline and time.monotonic() > deadline:
+                        break
+            except Exception as e:
+                if testing:
+                    raise
+                self.env.cr.rollback()
+                _logger.exception("Recalculo de comisiones %s falló", job.id)
+                job.write({'state': 'failed', 'error': str(e)})
+            if not testing:
+                self.env.cr.commit()
+            if deadline and time.monotonic() > deadline:
+                break
+
+    @api.model
+    def _cron_process_jobs(self, time_budget=240):
+        jobs = self.search([('state', 'in', ('pending', 'running'))], order='id')
+        jobs._run(time_budget=time_budget)
+        if jobs.filtered(lambda j: j.state in ('pending', 'running')):
+            # queda trabajo: re-disparar el cron en vez de ocupar el worker indefinidamente
+            self.env.ref('crm_commission.ir_cron_commission_recompute_jobs')._trigger()
+
+    def action_run_now(self):
+        self._run()
+        return True
+
+    def action_retry(self):
+        self.filtered(lambda j: j.state == 'failed').write({'state': 'pending', 'error': False})
+        return True
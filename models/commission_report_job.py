@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import base64
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+# Parámetros (ir.config_parameter)
+#  - líneas mínimas para generar en segundo plano (0 o vacío: siempre síncrono)
+ASYNC_MIN_LINES_PARAM = 'crm_commission.report_async_min_lines'
+#  - renders simultáneos como máximo
+ASYNC_WORKERS_PARAM = 'crm_commission.report_async_workers'
+DEFAULT_WORKERS = 2
+# Un trabajo "en proceso" por más de este tiempo se considera abandonado (worker reiniciado)
+STALE_AFTER = timedelta(hours=1)
+
+
+class CommissionReportJob(models.Model):
+    _name = 'commission.report.job'
+    _description = 'Generación de reportes de comisión en segundo plano'
+    _order = 'id desc'
+
+    name = fields.Char(string='Reporte', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='Solicitado por', required=True, readonly=True,
+                              index=True, default=lambda self: self.env.user)
+    company_id = fields.Many2one('res.company', string='Compañía', required=True, readonly=True,
+                                 default=lambda self: self.env.company)
+    report_ref = fields.Char(string='Reporte (xmlid)', required=True, readonly=True)
+    filename = fields.Char(string='Archivo', readonly=True)
+    data = fields.Json(string='Datos', readonly=True)
+    line_count = fields.Integer(string='Líneas', readonly=True)
+    state = fields.Selection(
+        [('pending', 'En cola'), ('running', 'Generando'), ('done', 'Listo'), ('failed', 'Error')],
+        string='Estado', default='pending', required=True, readonly=True, index=True,
+    )
+    attachment_id = fields.Many2one('ir.attachment', string='PDF', readonly=True, ondelete='set null')
+    date_start = fields.Datetime(string='Inicio', readonly=True)
+    date_end = fields.Datetime(string='Fin', readonly=True)
+    duration = fields.Float(string='Duración (s)', digits=(16, 2), readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+
+    # ----------------- ALTA -----------------
+
+    @api.model
+    def _get_async_min_lines(self):
+        value = self.env['ir.config_parameter'].sudo().get_param(ASYNC_MIN_LINES_PARAM)
+        try:
+            return int(value or 0)
+        except ValueError:
+            return 0
+
+    @api.model
+    def _get_max_workers(self):
+        value = self.env['ir.config_parameter'].sudo().get_param(ASYNC_WORKERS_PARAM)
+        try:
+            return max(1, int(value or DEFAULT_WORKERS))
+        except ValueError:
+            return DEFAULT_WORKERS
+
+    @api.model
+    def _should_enqueue(self, line_count):
+        """True si el modo asíncrono está activo y el reporte supera el umbral."""
+        min_lines = self._get_async_min_lines()
+        return bool(min_lines) and line_count >= min_lines
+
+    @api.model
+    def _enqueue(self, report_ref, name, filename, data, line_count):
+        job = self.sudo().create({
+            'name': name,
+            'user_id': self.env.user.id,
+            'company_id': self.env.company.id,
+            'report_ref': report_ref,
+            'filename': filename,
+            # fechas y demás valores no JSON se guardan como texto (igual que en la plantilla)
+            'data': json.loads(json.dumps(data, default=str)),
+            'line_count': line_count,
+        })
+        self._trigger_cron()
+        return job
+
+    @api.model
+    def _trigger_cron(self):
+        cron = self.env.ref('crm_commission.ir_cron_commission_report_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _enqueued_notification(self, job):
+        """Respuesta para el botón del wizard cuando el reporte se manda a la cola."""
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Reporte en proceso'),
+                'message': _('El reporte "%s" se está generando en segundo plano; '
+                             'recibirá un aviso con la liga de descarga al terminar.') % job.name,
+                'sticky': False,
+                'type': 'info',
+            }
+        }
+
+    # ----------------- WORKER -----------------
+
+    @api.model
+    def _requeue_stale(self):
+        stale = self.search([('state', '=', 'running'), ('date_start', '<', fields.Datetime.now() - STALE_AFTER)])
+        if stale:
+            stale.write({'state': 'pending', 'date_start': False})
+
+    @api.model
+    def _claim(self, limit):
+        """Toma hasta limit trabajos pendientes sin bloquear a otros workers."""
+        if limit <= 0:
+            return self.browse()
+        self.flush_model(['state'])
+        self.env.cr.execute("""
+            SELECT id FROM commission_report_job
+             WHERE state = 'pending'
+          ORDER BY id
+             LIMIT %s
+        FOR UPDATE SKIP LOCKED
+        """, [limit])
+        jobs = self.browse([row[0] for row in self.env.cr.fetchall()])
+        jobs.write({'state': 'running', 'date_start': fields.Datetime.now()})
+        return jobs
+
+    def _render(self):
+        """Genera el PDF del trabajo, lo adjunta y avisa al usuario por el bus."""
+        self.ensure_one()
+        started = time.monotonic()
+        Report = self.env['ir.actions.report'].with_user(self.user_id).with_company(self.company_id).with_context(
+            lang=self.user_id.lang or 'es_MX',
+            no_abbrev=True,
+            discard_logo_check=True,
+        )
+        pdf_bytes, _ = Report._render_qweb_pdf(self.report_ref, data=dict(self.data or {}))
+        attachment = self.env['ir.attachment'].sudo().create({
+            'name': self.filename or '%s.pdf' % self.name,
+            'type': 'binary',
+            'datas': base64.b64encode(pdf_bytes),
+            'mimetype': 'application/pdf',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        self.write({
+            'state': 'done',
+            'attachment_id': attachment.id,
+            'date_end': fields.Datetime.now(),
+            'duration': time.monotonic() - started,
+            'error': False,
+        })
+        self._notify_done()
+
+    def _notify_done(self):
+        self.ensure_one()
+        self.env['bus.bus']._sendone(self.user_id.partner_id, 'crm_commission/report_ready', {
+            'title': _('Reporte listo'),
+            'message': self.name,
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+        })
+
+    def _notify_failed(self):
+        self.ensure_one()
+        self.env['bus.bus']._sendone(self.user_id.partner_id, 'simple_notification', {
+            'title': _('Reporte con error'),
+            'message': _('No se pudo generar "%s".') % self.name,
+            'sticky': True,
+            'type': 'danger',
+        })
+
+    @api.model
+    def _process_job_id(self, job_id):
+        """Procesa un trabajo en su propio cursor (se ejecuta en un hilo del pool)."""
+        with self.pool.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            job = env[self._name].browse(job_id)
+            try:
+                job._render()
+                cr.commit()
+            except Exception as e:
+                cr.rollback()
+                _logger.exception("Reporte de comisiones en segundo plano %s falló", job_id)
+                job.write({'state': 'failed', 'error': str(e), 'date_end': fields.Datetime.now()})
+                job._notify_failed()
+                cr.commit()
+
+    @api.model
+    def _cron_process_jobs(self, time_budget=240):
+        """Worker local: renderiza trabajos en lotes de a lo más N en paralelo (N = tope configurado)."""
+        testing = getattr(threading.current_thread(), 'testing', False)
+        deadline = time.monotonic() + time_budget
+        workers = self._get_max_workers()
+        self._requeue_stale()
+        while time.monotonic() < deadline:
+            running = self.search_count([('state', '=', 'running')])
+            jobs = self._claim(workers - running)
+            if not jobs:
+                break
+            if testing:
+                for job in jobs:
+                    job._render()
+                continue
+            # los trabajos quedan "en proceso" y visibles para otros workers antes de renderizar
+            self.env.cr.commit()
+            with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                list(executor.map(self._process_job_id, jobs.ids))
+            self.env.invalidate_all()
+
+    def action_download(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+    def action_retry(self):
+        self.filtered(lambda j: j.state == 'failed').sudo().write({'state': 'pending', 'error': False})
+        self._trigger_cron()
+        return True
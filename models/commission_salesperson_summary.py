@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import calendar
+from datetime import date
+
+from odoo import models, fields, api
+
+from .commission_cache import invalidate_kpis
+
+# Llave en cr.precommit.data con los (compañía, vendedor, año, mes) a recalcular
+SUMMARY_QUEUE_KEY = 'crm_commission.salesperson_summary_keys'
+
+# Facturas que cuentan para comisión (mismo criterio que commission.report.wizard)
+PAID_INVOICE_WHERE = """
+    am.move_type = 'out_invoice'
+    AND am.state = 'posted'
+    AND am.payment_state = 'paid'
+"""
+
+AGGREGATE_SELECT = """
+    count(*),
+    count(*) FILTER (WHERE cpe.commission_paid),
+    COALESCE(sum(am.amount_untaxed), 0),
+    COALESCE(sum(am.amount_untaxed) FILTER (WHERE cpe.commission_paid), 0),
+    COALESCE(sum(am.commission_amount), 0),
+    COALESCE(sum(am.commission_amount) FILTER (WHERE cpe.commission_paid), 0)
+"""
+AGGREGATE_FIELDS = [
+    'invoice_count', 'invoice_paid_count',
+    'amount_base', 'amount_base_paid',
+    'commission_total', 'commission_paid',
+]
+
+
+class CommissionSalespersonSummary(models.Model):
+    _name = 'commission.salesperson.summary'
+    _description = 'Resumen mensual de comisiones por vendedor'
+    _order = 'year desc, month desc, user_id'
+    _rec_name = 'user_id'
+
+    company_id = fields.Many2one('res.company', string='Compañía', required=True, readonly=True, index=True)
+    user_id = fields.Many2one('res.users', string='Vendedor', required=True, readonly=True, index=True)
+    year = fields.Char(string='Año (YYYY)', size=4, required=True, readonly=True)
+    month = fields.Char(string='Mes (MM)', size=2, required=True, readonly=True)
+    currency_id = fields.Many2one(related='company_id.currency_id', readonly=True)
+
+    invoice_count = fields.Integer(string='Facturas', readonly=True)
+    invoice_paid_count = fields.Integer(string='Facturas con comisión pagada', readonly=True)
+    amount_base = fields.Monetary(string='Total ventas (base)', currency_field='currency_id', readonly=True)
+    amount_base_paid = fields.Monetary(string='Base (comisión pagada)', currency_field='currency_id', readonly=True)
+    commission_total = fields.Monetary(string='Total comisión', currency_field='currency_id', readonly=True)
+    commission_paid = fields.Monetary(string='Comisión pagada', currency_field='currency_id', readonly=True)
+    commission_unpaid = fields.Monetary(string='Comisión pendiente', currency_field='currency_id',
+                                        compute='_compute_unpaid')
+
+    _sql_constraints = [
+        ('uniq_company_user_period',
+         'unique(company_id, user_id, year, month)',
+         'Ya existe un resumen para ese vendedor y periodo.'),
+    ]
+
+    @api.depends('commission_total', 'commission_paid')
+    def _compute_unpaid(self):
+        for r in self:
+            r.commission_unpaid = r.commission_total - r.commission_paid
+
+    # ----------------- MANTENIMIENTO INCREMENTAL -----------------
+
+    @api.model
+    def _move_key(self, move, user=None):
+        user = user or move.invoice_user_id
+        if move.move_type != 'out_invoice' or not (user and move.invoice_date):
+            return None
+        return (move.company_id.id, user.id, move.invoice_date.strftime('%Y'), move.invoice_date.strftime('%m'))
+
+    @api.model
+    def _mark_dirty_moves(self, moves):
+        self._queue_keys(self._move_key(m) for m in moves)
+
+    @api.model
+    def _mark_dirty_entries(self, entries):
+        self._queue_keys(self._move_key(e.move_id, e.salesperson_id) for e in entries)
+
+    @api.model
+    def _queue_keys(self, keys):
+        """Encola periodos a recalcular al final de la transacción."""
+        keys = {k for k in keys if k}
+        if not keys:
+            return
+        pending = self.env.cr.precommit.data.setdefault(SUMMARY_QUEUE_KEY, set())
+        if not pending:
+            self.env.cr.precommit.add(self.sudo()._flush_dirty)
+        pending.update(keys)
+
+    @api.model
+    def _flush_dirty(self):
+        """Recalcula los periodos pendientes (precommit)."""
+        keys = self.env.cr.precommit.data.pop(SUMMARY_QUEUE_KEY, None)
+        if keys:
+            self.sudo()._refresh_keys(keys)
+            self.env.flush_all()
+
+    @api.model
+    def _flush_sources(self):
+        self.env['account.move'].flush_model([
+            'move_type', 'state', 'payment_state', 'invoice_date', 'invoice_user_id',
+            'company_id', 'amount_untaxed', 'commission_amount',
+        ])
+        self.env['commission.payment.entry'].flush_model(['move_id', 'salesperson_id', 'commission_paid'])
+
+    @api.model
+    def _refresh_keys(self, keys):
+        """Recalcula solo los (compañía, vendedor, año, mes) indicados, en una consulta agrupada."""
+        keys = set(keys)
+        self._flush_sources()
+        months = {(k[2], k[3]) for k in keys}
+        first = min(date(int(y), int(m), 1) for y, m in months)
+        last_y, last_m = max((int(y), int(m)) for y, m in months)
+        last = date(last_y, last_m, calendar.monthrange(last_y, last_m)[1])
+
+        self.env.cr.execute("""
+            SELECT am.company_id, am.invoice_user_id,
+                   to_char(am.invoice_date, 'YYYY'), to_char(am.invoice_date, 'MM'),
+                   %s
+              FROM account_move am
+         LEFT JOIN commission_payment_entry cpe
+                ON cpe.move_id = am.id AND cpe.salesperson_id = am.invoice_user_id
+             WHERE %s
+               AND am.invoice_user_id = ANY(%%s)
+               AND am.invoice_date BETWEEN %%s AND %%s
+          GROUP BY 1, 2, 3, 4
+        """ % (AGGREGATE_SELECT, PAID_INVOICE_WHERE), [list({k[1] for k in keys}), first, last])
+        values = {}
+        for row in self.env.cr.fetchall():
+            key = tuple(row[:4])
+            if key in keys:
+                values[key] = dict(zip(AGGREGATE_FIELDS, row[4:]))
+
+        existing = self.search([
+            ('user_id', 'in', list({k[1] for k in keys})),
+            ('year', 'in', list({k[2] for k in keys})),
+            ('month', 'in', list({k[3] for k in keys})),
+        ])
+        existing_by_key = {(s.company_id.id, s.user_id.id, s.year, s.month): s for s in existing}
+
+        to_create = []
+        to_unlink = self.browse()
+        for key in keys:
+            summary = existing_by_key.get(key)
+            vals = values.get(key)
+            if summary and vals:
+                summary.write(vals)
+            elif vals:
+                to_create.append(dict(vals, company_id=key[0], user_id=key[1], year=key[2], month=key[3]))
+            elif summary:
+                to_unlink |= summary
+        if to_create:
+            self.create(to_create)
+        if to_unlink:
+            to_unlink.unlink()
+        invalidate_kpis(self.env, {k[0] for k in keys})
+
+    @api.model
+    def _aggregate_period(self, company, year, month):
+        """{vendedor: valores} de un periodo completo de la compañía leídos de las facturas (sin escribir)."""
+        self._flush_sources()
+        first = date(int(year), int(month), 1)
+        last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+        self.env.cr.execute("""
+            SELECT am.invoice_user_id, %s
+              FROM account_move am
+         LEFT JOIN commission_payment_entry cpe
+                ON cpe.move_id = am.id AND cpe.salesperson_id = am.invoice_user_id
+             WHERE %s
+               AND am.company_id = %%s
+               AND am.invoice_user_id IS NOT NULL
+               AND am.invoice_date BETWEEN %%s AND %%s
+          GROUP BY 1
+        """ % (AGGREGATE_SELECT, PAID_INVOICE_WHERE), [company.id, first, last])
+        return {row[0]: dict(zip(AGGREGATE_FIELDS, row[1:])) for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _has_pending(self, company, year, month):
+        """True si algún vendedor del periodo está en la cola de esta transacción."""
+        return any(
+            k[0] == company.id and k[2] == year and k[3] == month
+            for k in self.env.cr.precommit.data.get(SUMMARY_QUEUE_KEY, ())
+        )
+
+    @api.model
+    def _rebuild_all(self):
+        """Reconstrucción completa (instalación/migración)."""
+        self._flush_sources()
+        self.env.cr.execute("""
+            SELECT DISTINCT am.company_id, am.invoice_user_id,
+                   to_char(am.invoice_date, 'YYYY'), to_char(am.invoice_date, 'MM')
+              FROM account_move am
+             WHERE %s
+               AND am.invoice_user_id IS NOT NULL
+               AND am.invoice_date IS NOT NULL
+        """ % PAID_INVOICE_WHERE)
+        keys = set(self.env.cr.fetchall())
+        self.sudo().search([]).unlink()
+        if keys:
+            self.sudo()._refresh_keys(keys)
+
+    # ----------------- LECTURA -----------------
+
+    @api.model
+    def _get_totals(self, user, date_start, date_end, filter_payment='all', company=None):
+        """Totales de un vendedor en un rango, sin construir líneas del wizard.
+
+        Si el rango cubre meses completos se suman filas del resumen; si no, se
+        agrega directamente sobre las facturas del rango (una consulta). Solo
+        facturas de ``company`` (la compañía del wizard).
+        """
+        company = company or self.env.company
+        full_months = (
+            date_start.day == 1
+            and date_end.day == calendar.monthrange(date_end.year, date_end.month)[1]
+        )
+        period_from = date_start.strftime('%Y%m')
+        period_to = date_end.strftime('%Y%m')
+        # Solo lectura (se usa desde computes): meses en la cola de esta transacción aún no
+        # se recalculan (eso pasa en precommit), así que se agregan las facturas directamente
+        pending = any(
+            k[0] == company.id and k[1] == user.id and period_from <= k[2] + k[3] <= period_to
+            for k in self.env.cr.precommit.data.get(SUMMARY_QUEUE_KEY, ())
+        )
+        if full_months and not pending:
+            rows = self.search([
+                ('company_id', '=', company.id),
+                ('user_id', '=', user.id),
+                ('year', '>=', date_start.strftime('%Y')),
+                ('year', '<=', date_end.strftime('%Y')),
+            ])
+            rows = rows.filtered(lambda r: period_from <= r.year + r.month <= period_to)
+            totals = {f: sum(rows.mapped(f)) for f in AGGREGATE_FIELDS}
+        else:
+            self._flush_sources()
+            self.env.cr.execute("""
+                SELECT %s
+                  FROM account_move am
+             LEFT JOIN commission_payment_entry cpe
+                    ON cpe.move_id = am.id AND cpe.salesperson_id = am.invoice_user_id
+                 WHERE %s
+                   AND am.company_id = %%s
+                   AND am.invoice_user_id = %%s
+                   AND am.invoice_date BETWEEN %%s AND %%s
+            """ % (AGGREGATE_SELECT, PAID_INVOICE_WHERE), [company.id, user.id, date_start, date_end])
+            totals = dict(zip(AGGREGATE_FIELDS, self.env.cr.fetchone()))
+
+        if filter_payment == 'paid':
+            return {
+                'invoice_count': totals['invoice_paid_count'],
+                'amount_base': totals['amount_base_paid'],
+                'commission_total': totals['commission_paid'],
+            }
+        if filter_payment == 'unpaid':
+            return {
+                'invoice_count': totals['invoice_count'] - totals['invoice_paid_count'],
+                'amount_base': totals['amount_base'] - totals['amount_base_paid'],
+                'commission_total': totals['commission_total'] - totals['commission_paid'],
+            }
+        return {
+            'invoice_count': totals['invoice_count'],
+            'amount_base': totals['amount_base'],
+            'commission_total': totals['commission_total'],
+        }
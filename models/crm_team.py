@@ -8,7 +8,7 @@
 # ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
 # ╚══════════════════════════════════════════════════════════════════╝
 
-from odoo import models, fields
+from odoo import models, fields, api
 
 class CrmTeam(models.Model):
     _inherit = 'crm.team'
@@ -16,4 +16,53 @@ class CrmTeam(models.Model):
     commission_percent = fields.Float(
         string='Comisión (%)',
         help='Porcentaje de comisión para los vendedores de este equipo'
-    )
\ No newline at end of file
+    )
+    commission_rate_ids = fields.One2many('commission.rate', 'team_id', string='Historial de comisión')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        teams = super().create(vals_list)
+        # Historial desde el alta: los cambios posteriores cierran esta versión
+        self.env['commission.rate'].sudo()._seed_team_versions(teams)
+        return teams
+
+    def write(self, vals):
+        changed = self.browse()
+        if 'commission_percent' in vals:
+            changed = self.filtered(lambda t: t.commission_percent != vals['commission_percent'])
+        previous = {team.id: team.commission_percent for team in changed}
+        res = super().write(vals)
+        if {'commission_percent', 'member_ids', 'crm_team_member_ids', 'company_id'}.intersection(vals):
+            self.env['commission.rate']._clear_rate_cache()
+        if changed:
+            # Nueva versión a partir de hoy; lo facturado antes conserva su porcentaje
+            today = fields.Date.context_today(self)
+            Rate = self.env['commission.rate'].sudo()
+            for team in changed:
+                Rate._record_version(
+                    team.commission_percent, team=team, date_from=today, previous_percent=previous[team.id],
+                )
+            self.env['commission.recompute.job'].sudo()._enqueue_for_teams(changed, date_from=today)
+        return res
+
+
+class CrmTeamMember(models.Model):
+    _inherit = 'crm.team.member'
+
+    # La membresía define el equipo (y su %) de cada vendedor: invalida el resolver
+    @api.model_create_multi
+    def create(self, vals_list):
+        members = super().create(vals_list)
+        self.env['commission.rate']._clear_rate_cache()
+        return members
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'crm_team_id', 'user_id', 'active', 'company_id'}.intersection(vals):
+            self.env['commission.rate']._clear_rate_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['commission.rate']._clear_rate_cache()
+        return res
@@ -8,8 +8,24 @@
 # ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
 # ╚══════════════════════════════════════════════════════════════════╝
 
+import logging
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import float_compare, sql
+
+from .commission_payment_batch import PAYMENT_METHODS
+
+_logger = logging.getLogger(__name__)
+
+# Llave en cr.precommit.data con las facturas pendientes de sincronizar al ledger
+LEDGER_QUEUE_KEY = 'crm_commission.mechanic_ledger_moves'
+
+# Campos que alteran el resumen mensual (mechanic.commission.summary)
+SUMMARY_FIELDS = {
+    'company_id', 'employee_id', 'year', 'month', 'is_paid',
+    'hours', 'payout', 'subtotal_customer',
+}
 
 class MechanicCommissionEntry(models.Model):
     _name = 'mechanic.commission.entry'
@@ -50,7 +66,7 @@ class MechanicCommissionEntry(models.Model):
     year = fields.Char(string='Año (YYYY)', size=4, index=True)
 
     pago_comision = fields.Selection(
-        [('efect', 'Efectivo'), ('trans', 'Transferencia')],
+        PAYMENT_METHODS,
         string='Pago comisión'
     )
 
@@ -61,6 +77,128 @@ class MechanicCommissionEntry(models.Model):
          'Ya existe una entrada de comisión para esta línea y mecánico.'),
     ]
 
+    def init(self):
+        # Cubre la consulta principal: mecánico + rango de fechas (semana, quincena, año...)
+        sql.create_index(
+            self.env.cr,
+            'mechanic_commission_entry_employee_date_idx',
+            self._table,
+            ['employee_id', 'invoice_date'],
+        )
+        # Pasivo de comisiones (commission.liability): solo entradas sin pagar
+        sql.create_index(
+            self.env.cr,
+            'mechanic_commission_entry_unpaid_idx',
+            self._table,
+            ['company_id', 'invoice_date', 'employee_id'],
+            where='is_paid IS NOT TRUE',
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        entries = super().create(vals_list)
+        self.env['mechanic.commission.summary']._mark_dirty(entries)
+        return entries
+
+    def write(self, vals):
+        vals = self._prepare_paid_vals(vals)
+        Summary = self.env['mechanic.commission.summary']
+        touches_summary = bool(SUMMARY_FIELDS.intersection(vals))
+        if touches_summary:
+            Summary._mark_dirty(self)  # periodo anterior (si cambia la llave)
+        res = super().write(vals)
+        if touches_summary:
+            Summary._mark_dirty(self)
+        if vals.get('is_paid'):
+            # Pagada sin forma de pago: efectivo por defecto
+            no_method = self.filtered(lambda e: not e.pago_comision)
+            if no_method:
+                super(MechanicCommissionEntry, no_method).write({'pago_comision': 'efectivo'})
+        return res
+
+    @api.model
+    def _prepare_paid_vals(self, vals, now=None):
+        """Metadata de pago: elegir forma de pago marca pagado; pagado sella fecha/usuario;
+        desmarcar limpia el sello. Valores explícitos en ``vals`` tienen prioridad."""
+        vals = dict(vals)
+        if vals.get('pago_comision'):
+            vals.setdefault('is_paid', True)
+        if 'is_paid' in vals:
+            if vals['is_paid']:
+                vals.setdefault('paid_date', now or fields.Datetime.now())
+                vals.setdefault('paid_by', self.env.user.id)
+            else:
+                vals.setdefault('paid_date', False)
+                vals.setdefault('paid_by', False)
+        return vals
+
+    def unlink(self):
+        self.env['mechanic.commission.summary']._mark_dirty(self)
+        return super().unlink()
+
+    def _line_payment_changes(self, vals):
+        """Cambios de pago pedidos desde una línea del wizard que difieren de la entrada
+        (mismo criterio que ``_inverse_line_ids``: forma de pago vacía no borra la actual)."""
+        self.ensure_one()
+        changes = {}
+        if 'is_paid' in vals or vals.get('pago_comision'):
+            # Elegir forma de pago implica pagado
+            is_paid = bool(vals.get('is_paid', self.is_paid) or vals.get('pago_comision'))
+            if is_paid != self.is_paid:
+                changes['is_paid'] = is_paid
+        if vals.get('pago_comision') and vals['pago_comision'] != self.pago_comision:
+            changes['pago_comision'] = vals['pago_comision']
+        return changes
+
+    @api.model
+    def _write_grouped(self, changes):
+        """Aplica ``[(entrada, vals)]`` agrupando por valores idénticos: una escritura
+        multi-registro por grupo y un solo sello de tiempo para todo el lote."""
+        now = fields.Datetime.now()
+        groups = {}
+        for entry, vals in changes:
+            if not vals:
+                continue
+            key = tuple(sorted(self._prepare_paid_vals(vals, now=now).items()))
+            groups.setdefault(key, []).append(entry.id)
+        for key, ids in groups.items():
+            self.browse(ids).write(dict(key))
+        return len(groups)
+
+    def _bulk_mark_paid(self, pago_comision, paid_date=None, note=None):
+        """Marca como pagadas, en una sola sentencia, solo las entradas pendientes de ``self``.
+
+        Devuelve (entradas afectadas, lote de bitácora).
+        """
+        self.check_access_rights('write')
+        self.check_access_rule('write')
+        paid_date = paid_date or fields.Datetime.now()
+        self.flush_recordset()
+        self.env.cr.execute("""
+            UPDATE mechanic_commission_entry
+               SET is_paid = TRUE,
+                   pago_comision = %s,
+                   paid_date = %s,
+                   paid_by = %s,
+                   pay_note = COALESCE(%s, pay_note),
+                   write_uid = %s,
+                   write_date = (now() at time zone 'UTC')
+             WHERE id = ANY(%s)
+               AND NOT COALESCE(is_paid, FALSE)
+         RETURNING id, payout
+        """, [pago_comision, paid_date, self.env.uid, note or None, self.env.uid, self.ids])
+        rows = self.env.cr.fetchall()
+        paid = self.browse([row[0] for row in rows])
+        if paid:
+            paid.invalidate_recordset([
+                'is_paid', 'pago_comision', 'paid_date', 'paid_by', 'pay_note', 'write_uid', 'write_date',
+            ])
+            self.env['mechanic.commission.summary']._mark_dirty(paid)
+        batch = self.env['commission.payment.batch']._log(
+            'mechanic', len(self), paid.ids, sum(row[1] or 0.0 for row in rows), pago_comision, paid_date, note,
+        )
+        return paid, batch
+
     @api.constrains('month', 'year')
     def _check_period(self):
         for r in self:
@@ -68,3 +206,262 @@ class MechanicCommissionEntry(models.Model):
                 raise ValidationError(_('Mes inválido: use formato "MM".'))
             if r.year and (len(r.year) != 4 or not r.year.isdigit()):
                 raise ValidationError(_('Año inválido: use formato "YYYY".'))
+
+    # ----------------- MATERIALIZACIÓN EN LOTE -----------------
+
+    @api.model
+    def _prepare_entry_vals(self, line, employee):
+        """Valores de la entrada para una línea de factura de servicio y su mecánico."""
+        tmpl = line.product_id.product_tmpl_id
+        cph = tmpl.service_cost_per_hour or 0.0
+        hrs_req = tmpl.service_hours_required or 0.0
+        qty = line.quantity or 0.0
+        hrs = hrs_req * qty
+        move = line.move_id
+        inv_date = move.invoice_date
+        return {
+            'company_id': move.company_id.id or self.env.company.id,
+            'employee_id': employee.id,
+            'invoice_id': move.id,
+            'invoice_line_id': line.id,
+            'invoice_name': f'{move.name or move.payment_reference or ""} - {move.partner_id.display_name}',
+            'invoice_date': inv_date,
+            'product_id': line.product_id.id,
+            'product_name': line.product_id.display_name,
+            'quantity': qty,
+            'hours': hrs,
+            'subtotal_customer': line.price_subtotal,
+            'payout': cph * hrs,
+            'cost_per_hour': cph,
+            'currency_id': line.currency_id.id or self.env.company.currency_id.id,
+            'month': inv_date.strftime('%m') if inv_date else False,
+            'year': inv_date.strftime('%Y') if inv_date else False,
+        }
+
+    def _entry_changes(self, vals):
+        """Subconjunto de ``vals`` cuyos valores difieren de lo almacenado en la entrada."""
+        self.ensure_one()
+        changes = {}
+        for fname, new in vals.items():
+            field = self._fields[fname]
+            old = self[fname]
+            if field.type == 'many2one':
+                differs = (old.id or False) != (new or False)
+            elif field.type in ('float', 'monetary'):
+                if field.type == 'monetary':
+                    digits = self.currency_id.decimal_places or 2
+                else:
+                    digits = (field.get_digits(self.env) or (16, 6))[1]
+                differs = bool(float_compare(old or 0.0, new or 0.0, precision_digits=digits))
+            else:
+                differs = (old or False) != (new or False)
+            if differs:
+                changes[fname] = new
+        return changes
+
+    @api.model
+    def _upsert_entries(self, vals_list):
+        """Inserta/actualiza en bloque usando la llave de ``uniq_employee_invoice_line``.
+
+        Una sola lectura de las entradas existentes, un ``create`` multi para las
+        nuevas y, para las que cambiaron, solo los campos distintos escritos en
+        grupos de valores idénticos (``_write_grouped``).
+        Devuelve ``(entries, stats)`` con stats = {'inserted', 'updated', 'unchanged'}.
+        """
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not vals_list:
+            return self.browse(), stats
+
+        # Última versión por llave (employee, invoice_line)
+        by_key = {}
+        for vals in vals_list:
+            by_key[(vals['employee_id'], vals['invoice_line_id'])] = vals
+
+        existing = self.search([
+            ('employee_id', 'in', list({k[0] for k in by_key})),
+            ('invoice_line_id', 'in', list({k[1] for k in by_key})),
+        ])
+        existing_by_key = {(e.employee_id.id, e.invoice_line_id.id): e for e in existing}
+
+        to_create = []
+        to_write = []
+        entry_ids = []
+        for key, vals in by_key.items():
+            entry = existing_by_key.get(key)
+            if not entry:
+                to_create.append(vals)
+                continue
+            entry_ids.append(entry.id)
+            changes = entry._entry_changes(vals)
+            if changes:
+                to_write.append((entry, changes))
+            else:
+                stats['unchanged'] += 1
+        if to_write:
+            self._write_grouped(to_write)
+            stats['updated'] = len(to_write)
+
+        if to_create:
+            entry_ids += self.create(to_create).ids
+            stats['inserted'] = len(to_create)
+
+        _logger.debug(
+            "mechanic.commission.entry upsert: %(inserted)s nuevas, %(updated)s actualizadas, "
+            "%(unchanged)s sin cambios", stats,
+        )
+        return self.browse(entry_ids), stats
+
+    @api.model
+    def _materialize_service_lines(self, lines, employee=None):
+        """Materializa entradas para líneas de servicio (una pasada, upsert en bloque).
+
+        Si no se indica ``employee`` se usa el ``mechanic_id`` de cada línea.
+        """
+        vals_list = []
+        for line in lines:
+            emp = employee or line.mechanic_id
+            if not emp:
+                continue
+            vals_list.append(self._prepare_entry_vals(line, emp))
+        return self._upsert_entries(vals_list)
+
+    # ----------------- LEDGER POR EVENTOS -----------------
+
+    @api.model
+    def _queue_ledger_sync(self, moves):
+        """Encola facturas para sincronizar el ledger al final de la transacción."""
+        ids = {m.id for m in moves if m.id and m.move_type == 'out_invoice'}
+        if not ids:
+            return
+        pending = self.env.cr.precommit.data.setdefault(LEDGER_QUEUE_KEY, set())
+        if not pending:
+            self.env.cr.precommit.add(self.sudo()._flush_ledger_queue)
+        pending.update(ids)
+
+    @api.model
+    def _flush_ledger_queue(self):
+        """Procesa las facturas encoladas; solo en el precommit de la transacción que las encoló
+        (las rutas de lectura de la interfaz no escriben el ledger)."""
+        pending = self.env.cr.precommit.data.pop(LEDGER_QUEUE_KEY, None)
+        if not pending:
+            return
+        self.sudo()._sync_from_moves(self.env['account.move'].browse(sorted(pending)))
+        self.env.flush_all()
+
+    @api.model
+    def _sync_from_moves(self, moves):
+        """Alinea el ledger con las facturas dadas.
+
+        - Factura pagada: upsert de sus líneas de servicio con mecánico.
+        - Entradas que ya no corresponden (factura no pagada o mecánico cambiado):
+          se retiran solo si la comisión no se ha pagado.
+        """
+        moves = moves.exists().filtered(lambda m: m.move_type == 'out_invoice')
+        if not moves:
+            return self.browse(), {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        paid = moves.filtered(lambda m: m.state == 'posted' and m.payment_state == 'paid')
+        lines = paid.invoice_line_ids.filtered(
+            lambda l: l.mechanic_id and l.product_id.type == 'service'
+        )
+        entries, stats = self._materialize_service_lines(lines)
+
+        stale = self.search([
+            ('invoice_id', 'in', moves.ids),
+            ('company_id', 'in', moves.company_id.ids),
+            ('id', 'not in', entries.ids),
+            ('is_paid', '=', False),
+        ])
+        if stale:
+            stale.unlink()
+        return entries, stats
+
+    @api.model
+    def _backfill_ledger(self):
+        """Carga inicial del ledger con todas las facturas pagadas existentes."""
+        line_ids = self._fetch_paid_service_line_ids()
+        lines = self.env['account.move.line'].browse(line_ids)
+        return self.sudo()._materialize_service_lines(lines)
+
+    # ----------------- CONSULTA DIRECTA DE LÍNEAS -----------------
+
+    @api.model
+    def _fetch_paid_service_line_ids(self, employee_ids=None, date_start=None, date_end=None, company=None):
+        """IDs de líneas de servicio con mecánico en facturas de cliente pagadas
+        (solo de ``company`` si se indica; el SQL no aplica reglas de registro).
+
+        Filtra en SQL por ``account_move_line.mechanic_id`` (indexado), el tipo de
+        producto y el estado/fecha de la factura: el costo crece con el trabajo del
+        mecánico, no con el volumen total de facturas del taller.
+        """
+        self.env['account.move.line'].flush_model(['mechanic_id', 'product_id', 'move_id', 'display_type'])
+        self.env['account.move'].flush_model(['move_type', 'state', 'payment_state', 'invoice_date', 'company_id'])
+        self.env['product.product'].flush_model(['product_tmpl_id'])
+        self.env['product.template'].flush_model(['type'])
+
+        where = [
+            "aml.display_type = 'product'",
+            "pt.type = 'service'",
+            "am.move_type = 'out_invoice'",
+            "am.state = 'posted'",
+            "am.payment_state = 'paid'",
+        ]
+        params = []
+        if company:
+            where.append("am.company_id = %s")
+            params.append(company.id)
+        if employee_ids:
+            where.append("aml.mechanic_id = ANY(%s)")
+            params.append(list(employee_ids))
+        else:
+            where.append("aml.mechanic_id IS NOT NULL")
+        if date_start:
+            where.append("am.invoice_date >= %s")
+            params.append(date_start)
+        if date_end:
+            where.append("am.invoice_date <= %s")
+            params.append(date_end)
+
+        self.env.cr.execute("""
+            SELECT aml.id
+              FROM account_move_line aml
+              JOIN account_move am ON am.id = aml.move_id
+              JOIN product_product pp ON pp.id = aml.product_id
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+             WHERE %s
+          ORDER BY am.invoice_date, aml.id
+        """ % " AND ".join(where), params)
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _sync_employee_period(self, employee, date_start, date_end, company=None):
+        """Reconcilia el ledger de un mecánico en un rango leyendo solo sus líneas."""
+        return self._sync_period(date_start, date_end, employees=employee, company=company)
+
+    @api.model
+    def _sync_period(self, date_start, date_end, employees=None, company=None):
+        """Reconcilia el ledger de un rango en una sola pasada.
+
+        Sin ``employees`` se leen las líneas de todos los mecánicos (una consulta) y
+        cada línea se asigna a su ``mechanic_id``. Solo toca facturas y entradas de
+        ``company`` (por defecto la compañía actual): se llama con sudo.
+        """
+        company = company or self.env.company
+        line_ids = self._fetch_paid_service_line_ids(
+            employees and employees.ids, date_start, date_end, company=company,
+        )
+        lines = self.env['account.move.line'].browse(line_ids)
+        employee = employees if employees and len(employees) == 1 else None
+        entries, stats = self._materialize_service_lines(lines, employee=employee)
+        domain = [
+            ('company_id', '=', company.id),
+            ('invoice_date', '>=', date_start),
+            ('invoice_date', '<=', date_end),
+            ('id', 'not in', entries.ids),
+            ('is_paid', '=', False),
+        ]
+        if employees:
+            domain.append(('employee_id', 'in', employees.ids))
+        stale = self.search(domain)
+        if stale:
+            stale.unlink()
+        return entries, stats
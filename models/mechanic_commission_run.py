@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import calendar
+import time
+from datetime import date, datetime
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from ..wizards.mechanic_commission_wizard import MONTHS
+
+
+class MechanicCommissionRun(models.Model):
+    _name = 'mechanic.commission.run'
+    _description = 'Nómina mensual de comisiones de mecánicos'
+    _order = 'year desc, month desc, id desc'
+
+    name = fields.Char(string='Descripción', compute='_compute_name', store=True)
+    company_id = fields.Many2one('res.company', string='Compañía', required=True,
+                                 default=lambda self: self.env.company)
+    currency_id = fields.Many2one(related='company_id.currency_id', readonly=True)
+    month = fields.Selection(MONTHS, string='Mes', required=True, default=lambda self: datetime.now().strftime('%m'))
+    year = fields.Selection(
+        [(str(y), str(y)) for y in range(datetime.now().year, datetime.now().year - 10, -1)],
+        string='Año', required=True, default=lambda self: str(datetime.now().year),
+    )
+    date_start = fields.Date(string='Desde', compute='_compute_dates')
+    date_end = fields.Date(string='Hasta', compute='_compute_dates')
+    state = fields.Selection([('draft', 'Borrador'), ('done', 'Calculada')], string='Estado',
+                             default='draft', required=True, readonly=True)
+    line_ids = fields.One2many('mechanic.commission.run.line', 'run_id', string='Mecánicos', readonly=True)
+
+    services_count = fields.Integer(string='Servicios', compute='_compute_totals')
+    hours = fields.Float(string='Horas', digits=(16, 2), compute='_compute_totals')
+    amount_invoiced = fields.Monetary(string='Importe facturado', currency_field='currency_id',
+                                      compute='_compute_totals')
+    payout = fields.Monetary(string='Comisión total', currency_field='currency_id', compute='_compute_totals')
+    payout_paid = fields.Monetary(string='Comisión pagada', currency_field='currency_id', compute='_compute_totals')
+    payout_unpaid = fields.Monetary(string='Comisión pendiente', currency_field='currency_id',
+                                    compute='_compute_totals')
+
+    # Estadísticas de la última corrida
+    entries_inserted = fields.Integer(string='Entradas nuevas', readonly=True)
+    entries_updated = fields.Integer(string='Entradas actualizadas', readonly=True)
+    duration = fields.Float(string='Duración (s)', digits=(16, 2), readonly=True)
+    date_run = fields.Datetime(string='Calculada el', readonly=True)
+
+    _sql_constraints = [
+        ('uniq_company_period', 'unique(company_id, year, month)', 'Ya existe una nómina para ese periodo.'),
+    ]
+
+    @api.depends('year', 'month')
+    def _compute_name(self):
+        months = dict(MONTHS)
+        for run in self:
+            run.name = _('Comisiones mecánicos %s %s') % (months.get(run.month, ''), run.year or '')
+
+    @api.depends('year', 'month')
+    def _compute_dates(self):
+        for run in self:
+            if run.year and run.month:
+                year, month = int(run.year), int(run.month)
+                run.date_start = date(year, month, 1)
+                run.date_end = date(year, month, calendar.monthrange(year, month)[1])
+            else:
+                run.date_start = run.date_end = False
+
+    @api.depends('line_ids.services_count', 'line_ids.hours', 'line_ids.amount_invoiced',
+                 'line_ids.payout', 'line_ids.payout_paid')
+    def _compute_totals(self):
+        for run in self:
+            lines = run.line_ids
+            run.services_count = sum(lines.mapped('services_count'))
+            run.hours = sum(lines.mapped('hours'))
+            run.amount_invoiced = sum(lines.mapped('amount_invoiced'))
+            run.payout = sum(lines.mapped('payout'))
+            run.payout_paid = sum(lines.mapped('payout_paid'))
+            run.payout_unpaid = run.payout - run.payout_paid
+
+    # ----------------- CÁLCULO -----------------
+
+    def _entries_domain(self):
+        self.ensure_one()
+        return [
+            ('company_id', '=', self.company_id.id),
+            ('invoice_date', '>=', self.date_start),
+            ('invoice_date', '<=', self.date_end),
+        ]
+
+    def _refresh_lines(self):
+        """Totales por mecánico con un read_group (mecánico x pagado) sobre el ledger."""
+        Entry = self.env['mechanic.commission.entry']
+        for run in self:
+            groups = Entry.read_group(
+                run._entries_domain(),
+                ['hours:sum', 'payout:sum', 'subtotal_customer:sum'],
+                ['employee_id', 'is_paid'],
+                lazy=False,
+            )
+            totals = {}
+            for g in groups:
+                if not g['employee_id']:
+                    continue
+                t = totals.setdefault(g['employee_id'][0], {
+                    'services_count': 0, 'services_paid_count': 0, 'hours': 0.0,
+                    'amount_invoiced': 0.0, 'payout': 0.0, 'payout_paid': 0.0,
+                })
+                t['services_count'] += g['__count']
+                t['hours'] += g['hours'] or 0.0
+                t['amount_invoiced'] += g['subtotal_customer'] or 0.0
+                t['payout'] += g['payout'] or 0.0
+                if g['is_paid']:
+                    t['services_paid_count'] += g['__count']
+                    t['payout_paid'] += g['payout'] or 0.0
+
+            run.line_ids.unlink()
+            self.env['mechanic.commission.run.line'].create([
+                dict(vals, run_id=run.id, employee_id=employee_id)
+                for employee_id, vals in totals.items()
+            ])
+
+    def action_compute(self):
+        """Materializa el ledger de todos los mecánicos del mes con una sola lectura de líneas."""
+        for run in self:
+            started = time.monotonic()
+            _entries, stats = self.env['mechanic.commission.entry'].sudo().with_company(run.company_id)._sync_period(
+                run.date_start, run.date_end, company=run.company_id,
+            )
+            run._refresh_lines()
+            run.write({
+                'state': 'done',
+                'entries_inserted': stats['inserted'],
+                'entries_updated': stats['updated'],
+                'duration': time.monotonic() - started,
+                'date_run': fields.Datetime.now(),
+            })
+        return True
+
+    # ----------------- PAGO Y REPORTE -----------------
+
+    def action_mark_all_paid(self):
+        self.ensure_one()
+        entries = self.env['mechanic.commission.entry'].search(self._entries_domain() + [('is_paid', '=', False)])
+        if not entries:
+            raise UserError(_('No hay comisiones pendientes en esta nómina.'))
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Marcar todas como pagadas'),
+            'res_model': 'mechanic.commission.mass.pay.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {
+                'default_entry_ids': [(6, 0, entries.ids)],
+                'parent_run_id': self.id,
+            }
+        }
+
+    def action_print_pdf(self):
+        self.ensure_one()
+        return self.env.ref('crm_commission.action_mechanic_commission_run_report').report_action(self)
+
+    def _get_entries_by_employee(self):
+        """{empleado: entradas} del periodo con una sola búsqueda (para el PDF)."""
+        self.ensure_one()
+        entries = self.env['mechanic.commission.entry'].search(
+            self._entries_domain(), order='employee_id, invoice_date asc, id asc',
+        )
+        grouped = {}
+        for entry in entries:
+            grouped.setdefault(entry.employee_id.id, self.env['mechanic.commission.entry'])
+            grouped[entry.employee_id.id] |= entry
+        return grouped
+
+
+class MechanicCommissionRunLine(models.Model):
+    _name = 'mechanic.commission.run.line'
+    _description = 'Totales por mecánico en la nómina de comisiones'
+    _order = 'payout desc, id'
+
+    run_id = fields.Many2one('mechanic.commission.run', string='Nómina', required=True, ondelete='cascade', index=True)
+    employee_id = fields.Many2one('hr.employee', string='Mecánico', required=True)
+    currency_id = fields.Many2one(related='run_id.currency_id', readonly=True)
+    services_count = fields.Integer(string='Servicios')
+    services_paid_count = fields.Integer(string='Servicios pagados')
+    hours = fields.Float(string='Horas', digits=(16, 2))
+    amount_invoiced = fields.Monetary(string='Importe facturado', currency_field='currency_id')
+    payout = fields.Monetary(string='Comisión', currency_field='currency_id')
+    payout_paid = fields.Monetary(string='Pagada', currency_field='currency_id')
+    payout_unpaid = fields.Monetary(string='Pendiente', currency_field='currency_id', compute='_compute_unpaid')
+
+    @api.depends('payout', 'payout_paid')
+    def _compute_unpaid(self):
+        for line in self:
+            line.payout_unpaid = line.payout - line.payout_paid
+
+    def action_open_entries(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Servicios de %s') % self.employee_id.name,
+            'res_model': 'mechanic.commission.entry',
+            'view_mode': 'tree,form',
+            'domain': self.run_id._entries_domain() + [('employee_id', '=', self.employee_id.id)],
+        }
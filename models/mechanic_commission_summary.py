@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from odoo import models, fields, api
+
+from .commission_cache import invalidate_kpis
+
+# Llave en cr.precommit.data con los (compañía, mecánico, año, mes) a recalcular
+SUMMARY_QUEUE_KEY = 'crm_commission.mechanic_summary_keys'
+
+# Columnas agregadas: (campo total, campo pagado, expresión SQL)
+SUMMARY_MEASURES = [
+    ('services_count', 'services_paid_count', 'count(*)'),
+    ('hours', 'hours_paid', 'sum(hours)'),
+    ('payout', 'payout_paid', 'sum(payout)'),
+    ('amount_invoiced', 'amount_invoiced_paid', 'sum(subtotal_customer)'),
+]
+
+
+class MechanicCommissionSummary(models.Model):
+    _name = 'mechanic.commission.summary'
+    _description = 'Resumen mensual de comisiones por mecánico'
+    _order = 'year desc, month desc, employee_id'
+    _rec_name = 'employee_id'
+
+    company_id = fields.Many2one('res.company', string='Compañía', required=True, readonly=True, index=True)
+    employee_id = fields.Many2one('hr.employee', string='Mecánico', required=True, readonly=True, index=True)
+    year = fields.Char(string='Año (YYYY)', size=4, required=True, readonly=True)
+    month = fields.Char(string='Mes (MM)', size=2, required=True, readonly=True)
+    currency_id = fields.Many2one(related='company_id.currency_id', readonly=True)
+
+    services_count = fields.Integer(string='Servicios', readonly=True)
+    services_paid_count = fields.Integer(string='Servicios pagados', readonly=True)
+    hours = fields.Float(string='Horas', digits=(16, 2), readonly=True)
+    hours_paid = fields.Float(string='Horas pagadas', digits=(16, 2), readonly=True)
+    payout = fields.Monetary(string='Comisión', currency_field='currency_id', readonly=True)
+    payout_paid = fields.Monetary(string='Comisión pagada', currency_field='currency_id', readonly=True)
+    amount_invoiced = fields.Monetary(string='Importe facturado', currency_field='currency_id', readonly=True)
+    amount_invoiced_paid = fields.Monetary(string='Facturado (pagado)', currency_field='currency_id', readonly=True)
+
+    # Pendientes = total - pagado (sin almacenar)
+    services_unpaid_count = fields.Integer(string='Servicios pendientes', compute='_compute_unpaid')
+    hours_unpaid = fields.Float(string='Horas pendientes', digits=(16, 2), compute='_compute_unpaid')
+    payout_unpaid = fields.Monetary(string='Comisión pendiente', currency_field='currency_id',
+                                    compute='_compute_unpaid')
+    amount_invoiced_unpaid = fields.Monetary(string='Facturado (pendiente)', currency_field='currency_id',
+                                             compute='_compute_unpaid')
+
+    _sql_constraints = [
+        ('uniq_company_employee_period',
+         'unique(company_id, employee_id, year, month)',
+         'Ya existe un resumen para ese mecánico y periodo.'),
+    ]
+
+    @api.depends('services_count', 'services_paid_count', 'hours', 'hours_paid',
+                 'payout', 'payout_paid', 'amount_invoiced', 'amount_invoiced_paid')
+    def _compute_unpaid(self):
+        for r in self:
+            r.services_unpaid_count = r.services_count - r.services_paid_count
+            r.hours_unpaid = r.hours - r.hours_paid
+            r.payout_unpaid = r.payout - r.payout_paid
+            r.amount_invoiced_unpaid = r.amount_invoiced - r.amount_invoiced_paid
+
+    # ----------------- MANTENIMIENTO INCREMENTAL -----------------
+
+    @api.model
+    def _entry_key(self, entry):
+        if not (entry.employee_id and entry.year and entry.month):
+            return None
+        return (entry.company_id.id, entry.employee_id.id, entry.year, entry.month)
+
+    @api.model
+    def _mark_dirty(self, entries):
+        """Encola los periodos tocados por ``entries``; se recalculan al final de la transacción."""
+        keys = {k for k in (self._entry_key(e) for e in entries) if k}
+        if not keys:
+            return
+        pending = self.env.cr.precommit.data.setdefault(SUMMARY_QUEUE_KEY, set())
+        if not pending:
+            self.env.cr.precommit.add(self.sudo()._flush_dirty)
+        pending.update(keys)
+
+    @api.model
+    def _flush_dirty(self):
+        """Recalcula los periodos pendientes (precommit)."""
+        keys = self.env.cr.precommit.data.pop(SUMMARY_QUEUE_KEY, None)
+        if keys:
+            self.sudo()._refresh_keys(keys)
+            self.env.flush_all()
+
+    @api.model
+    def _aggregate_keys(self, keys):
+        """Totales y pagados por (compañía, mecánico, año, mes) leídos del ledger, en una consulta agrupada."""
+        self.env['mechanic.commission.entry'].flush_model()
+        self.env.cr.execute("""
+            SELECT company_id, employee_id, year, month, %s
+              FROM mechanic_commission_entry
+             WHERE (company_id, employee_id, year, month) IN %%s
+          GROUP BY company_id, employee_id, year, month
+        """ % self._aggregate_select(), [tuple(keys)])
+        return {tuple(row[:4]): self._aggregate_vals(row[4:]) for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _aggregate_period(self, company, year, month):
+        """{mecánico: valores} de un periodo completo de la compañía leídos del ledger (sin escribir)."""
+        self.env['mechanic.commission.entry'].flush_model()
+        self.env.cr.execute("""
+            SELECT employee_id, %s
+              FROM mechanic_commission_entry
+             WHERE company_id = %%s AND year = %%s AND month = %%s AND employee_id IS NOT NULL
+          GROUP BY employee_id
+        """ % self._aggregate_select(), [company.id, year, month])
+        return {row[0]: self._aggregate_vals(row[1:]) for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _aggregate_select(self):
+        select = []
+        for _total, _paid, expr in SUMMARY_MEASURES:
+            select.append("COALESCE(%s, 0)" % expr)
+            select.append("COALESCE(%s FILTER (WHERE is_paid), 0)" % expr)
+        return ", ".join(select)
+
+    @api.model
+    def _aggregate_vals(self, row):
+        vals = {}
+        for i, (total, paid, _expr) in enumerate(SUMMARY_MEASURES):
+            vals[total] = row[2 * i]
+            vals[paid] = row[2 * i + 1]
+        return vals
+
+    @api.model
+    def _has_pending(self, company, year, month):
+        """True si algún mecánico del periodo está en la cola de esta transacción."""
+        return any(
+            k[0] == company.id and k[2] == year and k[3] == month
+            for k in self.env.cr.precommit.data.get(SUMMARY_QUEUE_KEY, ())
+        )
+
+    @api.model
+    def _refresh_keys(self, keys):
+        """Recalcula solo los (compañía, mecánico, año, mes) indicados, en una consulta agrupada."""
+        keys = sorted(keys)
+        values = self._aggregate_keys(keys)
+
+        existing = self.search([
+            ('employee_id', 'in', list({k[1] for k in keys})),
+            ('year', 'in', list({k[2] for k in keys})),
+            ('month', 'in', list({k[3] for k in keys})),
+        ])
+        existing_by_key = {(s.company_id.id, s.employee_id.id, s.year, s.month): s for s in existing}
+
+        to_create = []
+        to_unlink = self.browse()
+        for key in keys:
+            summary = existing_by_key.get(key)
+            vals = values.get(key)
+            if summary and vals:
+                summary.write(vals)
+            elif vals:
+                to_create.append(dict(vals, company_id=key[0], employee_id=key[1], year=key[2], month=key[3]))
+            elif summary:
+                to_unlink |= summary
+        if to_create:
+            self.create(to_create)
+        if to_unlink:
+            to_unlink.unlink()
+        invalidate_kpis(self.env, {k[0] for k in keys})
+
+    @api.model
+    def _rebuild_all(self):
+        """Reconstrucción completa (instalación/migración)."""
+        self.env['mechanic.commission.entry'].flush_model()
+        self.env.cr.execute("""
+            SELECT DISTINCT company_id, employee_id, year, month
+              FROM mechanic_commission_entry
+             WHERE employee_id IS NOT NULL AND year IS NOT NULL AND month IS NOT NULL
+        """)
+        keys = set(self.env.cr.fetchall())
+        self.sudo().search([]).unlink()
+        if keys:
+            self.sudo()._refresh_keys(keys)
+
+    # ----------------- LECTURA -----------------
+
+    @api.model
+    def _get_kpis(self, employee, year, month, paid_filter='all', company=None):
+        """KPIs de un mecánico-mes leyendo una sola fila del resumen.
+
+        Solo lectura (se usa desde computes): si el periodo está en la cola de esta
+        transacción, su fila aún no se recalcula (eso pasa en precommit) y se agrega
+        el ledger directamente.
+        """
+        company = company or self.env.company
+        key = (company.id, employee.id, year, month)
+        if key in self.env.cr.precommit.data.get(SUMMARY_QUEUE_KEY, ()):
+            vals = self._aggregate_keys([key]).get(key, {})
+        else:
+            summary = self.search([
+                ('company_id', '=', company.id),
+                ('employee_id', '=', employee.id),
+                ('year', '=', year),
+                ('month', '=', month),
+            ], limit=1)
+            vals = {
+                fname: summary[fname]
+                for total, paid, _expr in SUMMARY_MEASURES for fname in (total, paid)
+            } if summary else {}
+        if paid_filter == 'paid':
+            values = [vals.get(paid, 0) for _total, paid, _expr in SUMMARY_MEASURES]
+        elif paid_filter == 'unpaid':
+            values = [vals.get(total, 0) - vals.get(paid, 0) for total, paid, _expr in SUMMARY_MEASURES]
+        else:
+            values = [vals.get(total, 0) for total, _paid, _expr in SUMMARY_MEASURES]
+        keys = ['services_count', 'total_hours', 'payout_total', 'amount_invoiced']
+        return dict(zip(keys, values))
@@ -16,4 +16,28 @@ class ResUsers(models.Model):
     commission_percent = fields.Float(
         string='Porcentaje Comisión',
         help='Porcentaje de comisión para este vendedor'
-    )
\ No newline at end of file
+    )
+    commission_profiling = fields.Boolean(
+        string='Perfilar pantallas de comisiones',
+        groups='base.group_system',
+        help='Registra consultas SQL y tiempos de cada acción de los wizards de comisiones '
+             'de este usuario (Ajustes técnicos > Perfilado de comisiones).'
+    )
+
+    def write(self, vals):
+        changed = self.browse()
+        if 'commission_percent' in vals:
+            changed = self.filtered(lambda u: u.commission_percent != vals['commission_percent'])
+        res = super().write(vals)
+        if {'sale_team_id', 'company_id', 'company_ids'}.intersection(vals):
+            self.env['commission.rate']._clear_rate_cache()
+        if 'commission_profiling' in vals:
+            self.env['commission.profile.log'].clear_caches()
+        if changed:
+            # Excepción por vendedor versionada a partir de hoy (0 = sin excepción)
+            today = fields.Date.context_today(self)
+            Rate = self.env['commission.rate'].sudo()
+            for user in changed:
+                Rate._record_version(user.commission_percent, user=user, date_from=today)
+            self.env['commission.recompute.job'].sudo()._enqueue_for_users(changed, date_from=today)
+        return res
@@ -17,12 +17,14 @@ class SaleOrder(models.Model):
     commission_percent = fields.Float(string='Porcentaje Comisión (%)', compute='_compute_seller_commission', store=True)
     commission_amount = fields.Monetary(string='Monto Comisión', compute='_compute_seller_commission', store=True, currency_field='currency_id')
 
-    @api.depends('user_id', 'amount_untaxed')
+    @api.depends('user_id', 'amount_untaxed', 'date_order')
     def _compute_seller_commission(self):
+        Rate = self.env['commission.rate']
         for order in self:
             user = order.user_id
             order.seller_name = user.name if user else ''
-            # Puedes tomar el porcentaje del usuario o del equipo
-            percent = user.sale_team_id.commission_percent if user and user.sale_team_id else 0.0
+            # Excepción del vendedor o porcentaje del equipo vigente a la fecha del pedido
+            on_date = order.date_order.date() if order.date_order else None
+            percent = Rate._get_percent(user, on_date, order.company_id)
             order.commission_percent = percent
             order.commission_amount = order.amount_untaxed * (percent / 100.0)
\ No newline at end of file
@@ -0,0 +1,27 @@
+/** @odoo-module **/
+import { registry } from "@web/core/registry";
+
+// Aviso de "reporte listo" (commission.report.job) con botón de descarga
+export const commissionReportNotifyService = {
+    dependencies: ["bus_service", "notification"],
+    start(env, { bus_service, notification }) {
+        bus_service.subscribe("crm_commission/report_ready", ({ title, message, url }) => {
+            const close = notification.add(message, {
+                title,
+                type: "success",
+                sticky: true,
+                buttons: [{
+                    name: env._t("Descargar"),
+                    primary: true,
+                    onClick: () => {
+                        window.location.href = url;
+                        close();
+                    },
+                }],
+            });
+        });
+        bus_service.start();
+    },
+};
+
+registry.category("services").add("crm_commission_report_notify", commissionReportNotifyService);
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from datetime import date
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+from ..models.commission_cache import TX_CACHE_KEY, kpi_cache, report_cache
+
+# Marzo del año pasado: dentro de la selección de años del wizard de mecánicos
+BENCH_DATE = date(date.today().year - 1, 3, 1)
+BENCH_DATE_END = date(BENCH_DATE.year, 3, 31)
+BENCH_YEAR, BENCH_MONTH = BENCH_DATE.strftime('%Y'), BENCH_DATE.strftime('%m')
+
+
+class CommissionDataCommon(AccountTestInvoicingCommon):
+    """Vendedores, mecánicos y facturas pagadas sintéticas para medir los wizards.
+
+    El volumen se inserta en SQL clonando una factura plantilla con sus líneas (sin
+    pasar por el ORM) para que la preparación no domine el tiempo de la prueba.
+    Una fracción ``service_ratio`` de las facturas lleva su línea de servicio
+    asignada a un mecánico; el resto son ventas sin mecánico.
+    """
+
+    # Vendedores/mecánicos de relleno que comparten las filas de "otros"
+    n_salespeople = 2
+    n_mechanics = 2
+    # Fracción de facturas con línea de servicio de mecánico (0..1)
+    service_ratio = 1.0
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.env.user.groups_id |= (
+            cls.env.ref('crm_commission.group_commission_view')
+            | cls.env.ref('crm_commission.group_mechanic_commission_view')
+        )
+        Users = cls.env['res.users'].with_context(no_reset_password=True)
+        groups = [(6, 0, [
+            cls.env.ref('sales_team.group_sale_salesman').id,
+            cls.env.ref('crm_commission.group_commission_view').id,
+        ])]
+        cls.salespeople = Users.create([{
+            'name': 'Vendedor bench %s' % i,
+            'login': 'bench_salesperson_%s' % i,
+            'groups_id': groups,
+        } for i in range(cls.n_salespeople + 2)])
+        # [0] se mide, [1] sin facturas (para crear el wizard sin cargar líneas), resto relleno
+        cls.target_user, cls.empty_user = cls.salespeople[0], cls.salespeople[1]
+        cls.other_users = cls.salespeople[2:]
+
+        cls.mechanics = cls.env['hr.employee'].create([
+            {'name': 'Mecánico bench %s' % i} for i in range(cls.n_mechanics + 1)
+        ])
+        cls.target_mechanic = cls.mechanics[0]
+        cls.other_mechanics = cls.mechanics[1:]
+
+        # Servicio de taller: 2 h x 150 por unidad
+        cls.service_product = cls.env['product.product'].create({
+            'name': 'Servicio bench',
+            'type': 'service',
+            'lst_price': 1000.0,
+            'service_hours_required': 2.0,
+            'service_cost_per_hour': 150.0,
+            'taxes_id': [(6, 0, [])],
+        })
+
+        # Factura plantilla (no pagada: no cuenta en ningún wizard)
+        cls.template_move = cls.init_invoice(
+            'out_invoice', partner=cls.partner_a, invoice_date=BENCH_DATE,
+            products=cls.service_product, post=True,
+        )
+        cls.template_move.invoice_user_id = cls.target_user
+        cls.template_service_line = cls.template_move.invoice_line_ids.filtered(
+            lambda l: l.product_id == cls.service_product
+        )
+
+    def _clone_invoices(self, tag, count, user_ids, mechanic_ids=()):
+        """Inserta ``count`` facturas pagadas copiando la plantilla y sus líneas.
+
+        Vendedor en round-robin; la línea de servicio de una fracción ``service_ratio``
+        de las facturas se asigna a ``mechanic_ids`` (round-robin).
+        """
+        if not count or not user_ids:
+            return []
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT column_name FROM information_schema.columns
+             WHERE table_name = 'account_move' AND column_name NOT IN
+                   ('id', 'name', 'invoice_user_id', 'invoice_date', 'date', 'payment_state')
+        """)
+        columns = ', '.join('"%s"' % row[0] for row in self.env.cr.fetchall())
+        self.env.cr.execute("""
+            INSERT INTO account_move (%(columns)s, name, invoice_user_id, invoice_date, date, payment_state)
+                 SELECT %(columns)s,
+                        'BENCH/' || %%(tag)s || '/' || g,
+                        (%%(users)s::int[])[1 + g %%%% %%(n_users)s],
+                        %%(start)s::date + (g %%%% 28),
+                        %%(start)s::date + (g %%%% 28),
+                        'paid'
+                   FROM account_move, generate_series(1, %%(count)s) g
+                  WHERE account_move.id = %%(template)s
+               ORDER BY g
+              RETURNING id
+        """ % {'columns': columns}, {
+            'tag': '%s-%s' % (tag, count), 'users': list(user_ids), 'n_users': len(user_ids),
+            'start': BENCH_DATE, 'count': count, 'template': self.template_move.id,
+        })
+        move_ids = [row[0] for row in self.env.cr.fetchall()]
+        self._clone_invoice_lines(move_ids, mechanic_ids)
+        return move_ids
+
+    def _clone_invoice_lines(self, move_ids, mechanic_ids):
+        """Copia las líneas de la plantilla a ``move_ids`` (columnas de la factura tomadas de cada clon)."""
+        per_move = {
+            'move_id': 'am.id', 'move_name': 'am.name', 'date': 'am.date',
+            'invoice_date': 'am.invoice_date', 'mechanic_id': 'NULL',
+        }
+        self.env.cr.execute("""
+            SELECT column_name FROM information_schema.columns
+             WHERE table_name = 'account_move_line' AND column_name <> 'id'
+        """)
+        names = [row[0] for row in self.env.cr.fetchall()]
+        target = ', '.join('"%s"' % name for name in names)
+        source = ', '.join(per_move.get(name, 'aml."%s"' % name) for name in names)
+        self.env.cr.execute("""
+            INSERT INTO account_move_line (%(target)s)
+                 SELECT %(source)s
+                   FROM unnest(%%(moves)s::int[]) AS m(id)
+                   JOIN account_move am ON am.id = m.id
+                   JOIN account_move_line aml ON aml.move_id = %%(template)s
+        """ % {'target': target, 'source': source}, {
+            'moves': list(move_ids), 'template': self.template_move.id,
+        })
+        if not mechanic_ids:
+            return
+        # Fracción service_ratio de las facturas (por posición) con mecánico en su línea de servicio
+        self.env.cr.execute("""
+            UPDATE account_move_line aml
+               SET mechanic_id = (%(mechanics)s::int[])[1 + m.n %% %(n_mechanics)s]
+              FROM unnest(%(moves)s::int[]) WITH ORDINALITY AS m(id, n)
+             WHERE aml.move_id = m.id
+               AND aml.product_id = %(product)s
+               AND aml.display_type = 'product'
+               AND (m.n - 1) %% 100 < %(percent)s
+        """, {
+            'mechanics': list(mechanic_ids), 'n_mechanics': len(mechanic_ids), 'moves': list(move_ids),
+            'product': self.service_product.id, 'percent': round(self.service_ratio * 100),
+        })
+
+    def _insert_mechanic_entries(self, move_ids):
+        """Ledger ya materializado (SQL) para las líneas con mecánico de ``move_ids``; la mitad pagada.
+
+        Mismos valores que ``_prepare_entry_vals``: una resincronización no encuentra cambios.
+        """
+        if not move_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO mechanic_commission_entry (
+                company_id, employee_id, invoice_id, invoice_line_id, invoice_name, invoice_date,
+                product_id, product_name, quantity, hours, cost_per_hour, subtotal_customer, payout,
+                currency_id, is_paid, month, year,
+                create_uid, write_uid, create_date, write_date)
+            SELECT am.company_id, aml.mechanic_id, am.id, aml.id, am.name || ' - ' || %(partner)s,
+                   am.invoice_date, aml.product_id, %(product_name)s, aml.quantity,
+                   %(hours)s * aml.quantity, %(cost)s, aml.price_subtotal, %(cost)s * %(hours)s * aml.quantity,
+                   aml.currency_id, m.n %% 2 = 0,
+                   to_char(am.invoice_date, 'MM'), to_char(am.invoice_date, 'YYYY'),
+                   %(uid)s, %(uid)s, now() at time zone 'UTC', now() at time zone 'UTC'
+              FROM unnest(%(moves)s::int[]) WITH ORDINALITY AS m(id, n)
+              JOIN account_move am ON am.id = m.id
+              JOIN account_move_line aml ON aml.move_id = am.id AND aml.mechanic_id IS NOT NULL
+        """, {
+            'moves': list(move_ids), 'uid': self.env.uid,
+            'partner': self.template_move.partner_id.display_name,
+            'product_name': self.service_product.display_name,
+            'hours': self.service_product.service_hours_required,
+            'cost': self.service_product.service_cost_per_hour,
+        })
+
+    def _generate(self, size):
+        """``size`` facturas para el vendedor/mecánico medido y otras ``size`` de relleno.
+
+        Deja en ``target_services`` cuántas de las del mecánico medido llevan servicio.
+        """
+        target_moves = self._clone_invoices('T', size, [self.target_user.id], [self.target_mechanic.id])
+        other_moves = self._clone_invoices('O', size, self.other_users.ids, self.other_mechanics.ids)
+        self._insert_mechanic_entries(target_moves)
+        self._insert_mechanic_entries(other_moves)
+        self.env.cr.execute("""
+            SELECT count(*) FROM account_move_line
+             WHERE move_id = ANY(%s) AND mechanic_id = %s
+        """, [target_moves, self.target_mechanic.id])
+        self.target_services = self.env.cr.fetchone()[0]
+        self.env.invalidate_all()
+        self.env['mechanic.commission.summary']._rebuild_all()
+        self.env['commission.salesperson.summary']._rebuild_all()
+        self.env.flush_all()
+
+    def _reset_caches(self):
+        """Caché del ORM y cachés de resultados del módulo vacías (mide el camino frío)."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        self.env.cr.precommit.data.pop(TX_CACHE_KEY, None)
+        report_cache.clear()
+        kpi_cache.clear()
+
+    def _new_salesperson_wizard(self, user=None):
+        return self.env['commission.report.wizard'].create({
+            'user_id': (user or self.target_user).id,
+            'date_start': BENCH_DATE,
+            'date_end': BENCH_DATE_END,
+            'filter_payment': 'all',
+        })
+
+    def _new_mechanic_wizard(self):
+        return self.env['mechanic.commission.wizard'].create({
+            'employee_id': self.target_mechanic.id,
+            'period_type': 'month',
+            'year': BENCH_YEAR,
+            'month': BENCH_MONTH,
+            'report_paid_filter': 'all',
+        })
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+"""Benchmark de los wizards de comisiones con datos sintéticos (opt-in).
+
+No corre con la suite normal. Ejecutar con::
+
+    odoo-bin -d <db> -i crm_commission --test-tags crm_commission_bench --stop-after-init
+
+Variables de entorno:
+
+- ``CRM_COMMISSION_BENCH_SIZES``: líneas por wizard (``1000,10000,100000``).
+- ``CRM_COMMISSION_BENCH_SALESPEOPLE`` / ``CRM_COMMISSION_BENCH_MECHANICS``:
+  vendedores y mecánicos de relleno que comparten otras ``size`` filas (5 / 5).
+- ``CRM_COMMISSION_BENCH_SERVICE_RATIO``: fracción de facturas con línea de
+  servicio asignada a un mecánico (0.5); el resto son ventas sin mecánico.
+- ``CRM_COMMISSION_BENCH_OUTPUT``: archivo JSON de resultados.
+- ``CRM_COMMISSION_BENCH_BASELINE``: JSON de una corrida anterior; se reportan
+  las rutas que empeoran más de ``CRM_COMMISSION_BENCH_THRESHOLD`` (0.2 = 20 %).
+
+Cada ruta se mide con la caché del ORM y las cachés del módulo vacías: tiempo
+de pared, número de consultas SQL y pico de memoria Python (tracemalloc, que
+también se incluye en el tiempo; es igual en todas las corridas).
+"""
+
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from odoo import release
+from odoo.tests import tagged
+
+from .common import BENCH_DATE, BENCH_DATE_END, CommissionDataCommon
+
+_logger = logging.getLogger(__name__)
+
+
+def _env_list(name, default):
+    return [int(x) for x in os.environ.get(name, default).split(',') if x.strip()]
+
+
+def compare_results(baseline, current, threshold=0.2):
+    """Rutas de ``current`` que empeoran respecto a ``baseline`` (mismo formato JSON).
+
+    Devuelve ``[(llave, métrica, antes, después)]``; el número de consultas se
+    compara exacto y tiempo/memoria con la tolerancia ``threshold``.
+    """
+    regressions = []
+    before_all = baseline.get('results', {})
+    for key, after in current.get('results', {}).items():
+        before = before_all.get(key)
+        if not before:
+            continue
+        if after['queries'] > before['queries']:
+            regressions.append((key, 'queries', before['queries'], after['queries']))
+        for metric in ('wall_ms', 'peak_kb'):
+            if before[metric] and after[metric] > before[metric] * (1 + threshold):
+                regressions.append((key, metric, before[metric], after[metric]))
+    return regressions
+
+
+@tagged('post_install', '-at_install', '-standard', 'crm_commission_bench')
+class TestCommissionBenchmark(CommissionDataCommon):
+
+    n_salespeople = int(os.environ.get('CRM_COMMISSION_BENCH_SALESPEOPLE', 5))
+    n_mechanics = int(os.environ.get('CRM_COMMISSION_BENCH_MECHANICS', 5))
+    service_ratio = float(os.environ.get('CRM_COMMISSION_BENCH_SERVICE_RATIO', 0.5))
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.sizes = _env_list('CRM_COMMISSION_BENCH_SIZES', '1000,10000,100000')
+        cls.results = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._write_results()
+        super().tearDownClass()
+
+    def _generate(self, size):
+        started = time.perf_counter()
+        super()._generate(size)
+        _logger.info("Benchmark: datos para %s líneas generados en %.1fs", size, time.perf_counter() - started)
+
+    # ----------------- MEDICIÓN -----------------
+
+    def _measure(self, path, size, func):
+        self._reset_caches()
+
+        queries_before = self.env.cr.sql_log_count
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = func()
+        self.env.flush_all()
+        wall = time.perf_counter() - started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        record = {
+            'path': path,
+            'size': size,
+            'wall_ms': round(wall * 1000, 1),
+            'queries': self.env.cr.sql_log_count - queries_before,
+            'peak_kb': round(peak / 1024, 1),
+        }
+        self.results['%s@%s' % (path, size)] = record
+        _logger.info("Benchmark %(path)s @ %(size)s: %(wall_ms)s ms, %(queries)s consultas, %(peak_kb)s KiB", record)
+        return result
+
+    def _bench_salesperson(self, size):
+        wizard = self._new_salesperson_wizard(self.empty_user)
+        wizard.user_id = self.target_user
+        self._measure('commission.report.wizard._load_lines', size, wizard._load_lines)
+        self._measure('commission.report.wizard._compute_totals', size, wizard._compute_totals)
+        self.assertEqual(wizard.lines_count, size)
+        self._measure('commission.report.wizard.action_print_pdf', size, wizard.action_print_pdf)
+
+    def _bench_mechanic(self, size):
+        wizard = self._new_mechanic_wizard()
+        self._measure('mechanic.commission.wizard._onchange_build_lines', size, wizard._onchange_build_lines)
+        self._measure('mechanic.commission.wizard._compute_totals', size, wizard._compute_totals)
+        self.assertEqual(wizard.services_count, self.target_services)
+
+        def print_pdf():
+            action = wizard.action_print_pdf()
+            # la acción solo arma los datos (el PDF lo pide el cliente web): se renderiza aquí para medir todo
+            return self.env['ir.actions.report']._render_qweb_pdf(
+                'crm_commission.action_mechanic_commission_report', res_ids=wizard.ids, data=action['data'],
+            )
+        self._measure('mechanic.commission.wizard.action_print_pdf', size, print_pdf)
+
+    def _bench_ledger_sync(self, size):
+        """Materialización del ledger desde las líneas de servicio (selección SQL + upsert)."""
+        Entry = self.env['mechanic.commission.entry'].sudo()
+        moves = self.env['account.move'].search([('name', '=like', 'BENCH/%%-%s/%%' % size)])
+
+        # Ledger al día: todo se reconcilia como "sin cambios"
+        _entries, stats = self._measure(
+            'mechanic.commission.entry._sync_period', size,
+            lambda: Entry._sync_period(BENCH_DATE, BENCH_DATE_END),
+        )
+        self.assertFalse(stats['inserted'])
+        self._measure('mechanic.commission.entry._sync_from_moves', size, lambda: Entry._sync_from_moves(moves))
+
+        # Ledger vacío: una entrada nueva por línea con mecánico
+        self.env.cr.execute("DELETE FROM mechanic_commission_entry WHERE invoice_id = ANY(%s)", [moves.ids])
+        _entries, stats = self._measure(
+            'mechanic.commission.entry._sync_period(vacío)', size,
+            lambda: Entry._sync_period(BENCH_DATE, BENCH_DATE_END),
+        )
+        self.assertTrue(stats['inserted'] >= self.target_services)
+
+    def test_benchmark(self):
+        # el modo asíncrono mandaría los PDF grandes a la cola en lugar de renderizarlos
+        self.env['ir.config_parameter'].sudo().set_param('crm_commission.report_async_min_lines', 0)
+        for size in self.sizes:
+            self.env.cr.execute('SAVEPOINT crm_commission_bench')
+            try:
+                self._generate(size)
+                self._bench_salesperson(size)
+                self._bench_mechanic(size)
+                self._bench_ledger_sync(size)
+            finally:
+                self.env.cr.execute('ROLLBACK TO SAVEPOINT crm_commission_bench')
+                self.env.cr.precommit.clear()
+                self.env.invalidate_all()
+
+    # ----------------- RESULTADOS -----------------
+
+    @classmethod
+    def _write_results(cls):
+        if not cls.results:
+            return
+        output = os.environ.get('CRM_COMMISSION_BENCH_OUTPUT') or os.path.join(
+            tempfile.gettempdir(), 'crm_commission_bench.json')
+        current = {
+            'meta': {
+                'date': datetime.utcnow().isoformat(timespec='seconds'),
+                'odoo': release.version,
+                'python': platform.python_version(),
+                'database': cls.env.cr.dbname,
+                'sizes': cls.sizes,
+                'salespeople': len(cls.other_users),
+                'mechanics': len(cls.other_mechanics),
+                'service_ratio': cls.service_ratio,
+            },
+            'results': dict(sorted(cls.results.items())),
+        }
+        with open(output, 'w') as f:
+            json.dump(current, f, indent=2)
+        _logger.info("Benchmark: resultados en %s", output)
+
+        baseline_path = os.environ.get('CRM_COMMISSION_BENCH_BASELINE')
+        if baseline_path and os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+            threshold = float(os.environ.get('CRM_COMMISSION_BENCH_THRESHOLD', 0.2))
+            regressions = compare_results(baseline, current, threshold)
+            for key, metric, before, after in regressions:
+                _logger.warning("Benchmark: %s empeoró en %s: %s -> %s", key, metric, before, after)
+            if not regressions:
+                _logger.info("Benchmark: sin regresiones frente a %s", baseline_path)
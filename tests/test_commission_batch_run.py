@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+import subprocess
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from ..models import commission_batch_run
+from .common import BENCH_DATE, BENCH_DATE_END, CommissionDataCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionBatchRun(CommissionDataCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.team = cls.env['crm.team'].create({
+            'name': 'Equipo bench',
+            'company_id': cls.env.company.id,
+            'member_ids': [(6, 0, cls.target_user.ids)],
+        })
+
+    def _new_run(self, filter_payment='all'):
+        return self.env['commission.batch.run'].create({
+            'team_id': self.team.id,
+            'date_start': BENCH_DATE,
+            'date_end': BENCH_DATE_END,
+            'filter_payment': filter_payment,
+            'company_id': self.env.company.id,
+        })
+
+    def test_collect_without_payment_entries(self):
+        """Facturas pagadas sin commission.payment.entry: entran al estado como no pagadas."""
+        self._generate(3)
+        Entry = self.env['commission.payment.entry']
+        self.assertFalse(Entry.search_count([('salesperson_id', '=', self.target_user.id)]))
+
+        for filter_payment in ('all', 'unpaid'):
+            run = self._new_run(filter_payment)
+            data = run._collect_report_data(run._get_users())
+            self.assertIn(self.target_user.id, data)
+            lines = data[self.target_user.id]['invoice_lines']
+            self.assertEqual(len(lines), 3)
+            self.assertEqual({line['commission_paid'] for line in lines}, {'No'})
+
+        run = self._new_run('paid')
+        self.assertFalse(run._collect_report_data(run._get_users()))
+        # la corrida es de solo lectura: no crea entradas
+        self.assertFalse(Entry.search_count([('salesperson_id', '=', self.target_user.id)]))
+
+    def test_render_statements_parallel(self):
+        """Camino en paralelo (pool de wkhtmltopdf) con wkhtmltopdf simulado."""
+        self._generate(3)
+        run = self._new_run()
+        data_by_user = run._collect_report_data(run._get_users())
+        calls = []
+
+        def fake_wkhtmltopdf(command, **kwargs):
+            html_paths = [arg for arg in command if arg.endswith('.html')]
+            self.assertTrue(html_paths)
+            for path in html_paths:
+                with open(path, 'rb') as f:
+                    self.assertIn(b'<', f.read())
+            with open(command[-1], 'wb') as f:
+                f.write(b'%PDF-1.4 crm_commission')
+            calls.append(command)
+            return subprocess.CompletedProcess(command, 0, b'', b'')
+
+        with patch.object(type(run), '_can_render_in_parallel', return_value=True), \
+                patch.object(commission_batch_run, '_get_wkhtmltopdf_bin', return_value='wkhtmltopdf'), \
+                patch.object(commission_batch_run.subprocess, 'run', side_effect=fake_wkhtmltopdf):
+            results = run._render_statements(data_by_user)
+
+        self.assertEqual(set(results), set(data_by_user))
+        self.assertEqual(len(calls), len(data_by_user))
+        for pdf_bytes, _html_time, _pdf_time in results.values():
+            self.assertEqual(pdf_bytes, b'%PDF-1.4 crm_commission')
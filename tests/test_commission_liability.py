@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from datetime import datetime, time, timedelta
+
+from odoo.tests import tagged
+
+from .common import BENCH_DATE_END, CommissionDataCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionLiability(CommissionDataCommon):
+
+    def _outstanding(self, as_of):
+        result = self.env['commission.liability'].get_outstanding(as_of=as_of)
+        salespersons = {r['user_id']: r['invoice_count'] for r in result['salespersons']}
+        mechanics = {r['employee_id']: r['services_count'] for r in result['mechanics']}
+        return salespersons.get(self.target_user.id, 0), mechanics.get(self.target_mechanic.id, 0)
+
+    def test_paid_after_as_of_still_outstanding(self):
+        """Lo pagado después de ``as_of`` se debía a esa fecha; lo pagado antes no."""
+        self._generate(4)
+        moves = self.env['account.move'].search([('name', '=like', 'BENCH/T-4/%')])
+        # El vendedor medido no tiene equipo: se fija una comisión para que la factura genere pasivo
+        self.env.cr.execute("UPDATE account_move SET commission_amount = 100 WHERE id = ANY(%s)", [moves.ids])
+        self.env.invalidate_all()
+
+        paid_late = datetime.combine(BENCH_DATE_END + timedelta(days=10), time(12))
+        paid_early = datetime.combine(BENCH_DATE_END - timedelta(days=1), time(12))
+        Payment = self.env['commission.payment.entry']
+        entries = Payment.create([{'move_id': m.id, 'salesperson_id': self.target_user.id} for m in moves])
+        entries[:2]._bulk_mark_paid('efectivo', paid_late)
+        entries[2:3]._bulk_mark_paid('efectivo', paid_early)
+
+        mechanic_entries = self.env['mechanic.commission.entry'].search([
+            ('employee_id', '=', self.target_mechanic.id),
+        ])
+        paid = mechanic_entries.filtered('is_paid')
+        self.assertEqual(len(paid), 2)
+        paid[0].paid_date = paid_late
+        paid[1].paid_date = paid_early
+
+        # Al cierre del mes: solo lo pagado antes del corte deja de contar
+        self.assertEqual(self._outstanding(BENCH_DATE_END), (3, 3))
+        # Hoy: todo lo pagado ya salió del pasivo
+        self.assertEqual(self._outstanding(None), (1, 2))
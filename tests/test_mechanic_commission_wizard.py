@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+from datetime import datetime
+
+from odoo.tests import tagged
+
+from .common import BENCH_MONTH, BENCH_YEAR, CommissionDataCommon
+
+
+@tagged('post_install', '-at_install')
+class TestMechanicCommissionWizard(CommissionDataCommon):
+
+    def test_create_keeps_existing_payment_stamp(self):
+        """El primer guardado manda todas las líneas: las ya pagadas conservan fecha/usuario de pago."""
+        self._generate(4)
+        Entry = self.env['mechanic.commission.entry']
+        entries = Entry.search([('employee_id', '=', self.target_mechanic.id)], order='id')
+        paid, unpaid = entries.filtered('is_paid'), entries.filtered(lambda e: not e.is_paid)
+        self.assertTrue(paid and unpaid)
+        stamp = datetime(int(BENCH_YEAR), int(BENCH_MONTH), 20, 10, 0)
+        paid.write({'pago_comision': 'transferencia', 'paid_date': stamp, 'paid_by': self.empty_user.id})
+
+        self.env['mechanic.commission.wizard'].create({
+            'employee_id': self.target_mechanic.id,
+            'period_type': 'month',
+            'year': BENCH_YEAR,
+            'month': BENCH_MONTH,
+            'line_ids': [(0, 0, {
+                'commission_entry_id': entry.id,
+                'is_paid': True,
+                'pago_comision': entry.pago_comision or 'efectivo',
+            }) for entry in entries],
+        })
+
+        for entry in paid:
+            self.assertEqual(entry.paid_date, stamp)
+            self.assertEqual(entry.paid_by, self.empty_user)
+            self.assertEqual(entry.pago_comision, 'transferencia')
+        for entry in unpaid:
+            self.assertTrue(entry.is_paid)
+            self.assertEqual(entry.pago_comision, 'efectivo')
+            self.assertEqual(entry.paid_by, self.env.user)
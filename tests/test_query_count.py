@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# ╔══════════════════════════════════════════════════════════════════╗
+# ║  DCR INFORMATIC SERVICES SAS DE CV                               ║
+# ║  Web: https://www.dcrsoluciones.com                              ║
+# ║  Contacto: info@dcrsoluciones.com                                ║
+# ║                                                                  ║
+# ║  Este módulo está bajo licencia (LGPLv3).                        ║
+# ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
+# ╚══════════════════════════════════════════════════════════════════╝
+
+"""Tope de consultas SQL en los caminos calientes de los wizards de comisiones.
+
+Cada camino se ejecuta con dos volúmenes de datos. En ambos debe quedar bajo el
+tope de ``assertQueryCount`` y, además, el volumen grande no puede usar más
+consultas que el chico: un patrón N+1 (búsqueda o lectura por línea) falla
+aunque siga bajo el tope.
+"""
+
+from odoo.tests import tagged
+from odoo.tests.common import warmup
+
+from .common import BENCH_MONTH, BENCH_YEAR, CommissionDataCommon
+
+# Filas del vendedor/mecánico medido: una página parcial y más de una página
+# completa del wizard (LINES_PAGE_SIZE = 80), para cubrir también la paginación
+QUERY_SIZES = (5, 120)
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionQueryCount(CommissionDataCommon):
+
+    def _assert_flat(self, bound, prepare, run):
+        """``run(prepare())`` con a lo más ``bound`` consultas y sin crecer con el volumen."""
+        counts = {}
+        for size in QUERY_SIZES:
+            self.env.cr.execute('SAVEPOINT crm_commission_query_count')
+            try:
+                self._generate(size)
+                subject = prepare()
+                self._reset_caches()
+                before = self.cr.sql_log_count
+                with self.assertQueryCount(bound):
+                    run(subject)
+                counts[size] = self.cr.sql_log_count - before
+            finally:
+                self.env.cr.execute('ROLLBACK TO SAVEPOINT crm_commission_query_count')
+                self.env.cr.precommit.clear()
+                self.env.invalidate_all()
+        if self.warm:
+            small, large = (counts[size] for size in QUERY_SIZES)
+            self.assertLessEqual(
+                large, small,
+                "Las consultas crecen con el número de filas: %s" % counts,
+            )
+
+    # ----------------- VENDEDORES -----------------
+
+    @warmup
+    def test_salesperson_wizard_load(self):
+        def run(_subject):
+            wizard = self._new_salesperson_wizard()
+            self.assertTrue(wizard.line_ids)
+            self.assertTrue(wizard.lines_count)
+        self._assert_flat(60, lambda: None, run)
+
+    @warmup
+    def test_salesperson_wizard_save(self):
+        def run(wizard):
+            wizard.write({'line_ids': [
+                (1, line.id, {'payment_method': 'efectivo'}) for line in wizard.line_ids
+            ]})
+            wizard.action_save()
+        self._assert_flat(50, self._new_salesperson_wizard, run)
+
+    @warmup
+    def test_salesperson_mass_payment(self):
+        def run(wizard):
+            action = wizard.action_mark_all_paid()
+            self.env[action['res_model']].with_context(action['context']).create({
+                'payment_method': 'transferencia',
+            }).action_confirm()
+        self._assert_flat(60, self._new_salesperson_wizard, run)
+
+    @warmup
+    def test_salesperson_report_data(self):
+        def run(wizard):
+            self.assertTrue(wizard._prepare_report_data())
+        self._assert_flat(40, self._new_salesperson_wizard, run)
+
+    # ----------------- MECÁNICOS -----------------
+
+    def _loaded_mechanic_wizard(self):
+        wizard = self._new_mechanic_wizard()
+        wizard._onchange_build_lines()
+        return wizard
+
+    @warmup
+    def test_mechanic_wizard_load(self):
+        def run(_subject):
+            wizard = self._loaded_mechanic_wizard()
+            self.assertTrue(wizard.line_ids)
+            self.assertTrue(wizard.services_count)
+            wizard.payout_total
+        self._assert_flat(30, lambda: None, run)
+
+    @warmup
+    def test_mechanic_wizard_save(self):
+        def run(wizard):
+            wizard.write({'line_ids': [
+                (1, line.id, {'is_paid': True, 'pago_comision': 'efectivo'}) for line in wizard.line_ids
+            ]})
+        self._assert_flat(30, self._loaded_mechanic_wizard, run)
+
+    @warmup
+    def test_mechanic_wizard_create(self):
+        # Primer guardado del formulario: el wizard nace con sus líneas como (0, 0, vals)
+        def prepare():
+            return self._loaded_mechanic_wizard().line_ids.commission_entry_id
+
+        def run(entries):
+            self.env['mechanic.commission.wizard'].create({
+                'employee_id': self.target_mechanic.id,
+                'period_type': 'month',
+                'year': BENCH_YEAR,
+                'month': BENCH_MONTH,
+                'line_ids': [
+                    (0, 0, {'commission_entry_id': entry.id, 'is_paid': True, 'pago_comision': 'efectivo'})
+                    for entry in entries
+                ],
+            })
+            self.assertEqual(set(entries.mapped('pago_comision')), {'efectivo'})
+        self._assert_flat(30, prepare, run)
+
+    @warmup
+    def test_mechanic_mass_payment(self):
+        def run(wizard):
+            action = wizard.action_mark_all_paid()
+            self.env[action['res_model']].with_context(action['context']).create({
+                'pago_comision': 'transferencia',
+            }).action_confirm()
+        self._assert_flat(40, self._new_mechanic_wizard, run)
+
+    @warmup
+    def test_mechanic_report_data(self):
+        def run(wizard):
+            action = wizard.action_print_pdf()
+            self.assertEqual(len(action['data']['lines']), wizard.services_count)
+        self._assert_flat(30, self._new_mechanic_wizard, run)
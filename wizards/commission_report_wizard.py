@@ -10,12 +10,28 @@
 
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from ..models.commission_cache import cache_get, cache_set, invalidate_salespersons
+from ..models.commission_payment_batch import PAYMENT_METHODS
+from ..models.commission_profile import profiled
 import base64
+import hashlib
+import json
 
-PAYMENT_METHODS = [
-    ('efectivo', 'Efectivo'),
-    ('transferencia', 'Transferencia'),
+# Columnas de la exportación CSV/XLSX (encabezado en el mismo orden que cada fila)
+EXPORT_COLUMNS = [
+    'Factura', 'Fecha', 'Cliente', 'Total sin IVA', '% Comisión', 'Comisión',
+    'Comisión pagada', 'Forma de pago', 'Fecha/Hora pago', 'Registró',
 ]
+EXPORT_CHUNK_SIZE = 1000
+
+# Líneas que se cargan en el wizard; el resto se consulta paginado sobre commission.payment.entry
+LINES_PAGE_SIZE = 80
+
+# Caché de PDFs: la huella de los datos va en ir.attachment.name (búsqueda por res_model,
+# columna indexada). Los adjuntos se borran con su wizard en el vacuum de transitorios.
+# Subir REPORT_CACHE_VERSION si cambia la plantilla para invalidar los PDFs previos.
+REPORT_CACHE_PREFIX = 'crm_commission.report:'
+REPORT_CACHE_VERSION = 3
 
 def _default_date_start(self):
     today = fields.Date.context_today(self)
@@ -33,6 +49,8 @@ class CommissionReportWizard(models.TransientModel):
     user_id = fields.Many2one('res.users', string='Vendedor', required=True)
     date_start = fields.Date(string='Desde', required=True, default=_default_date_start)
     date_end   = fields.Date(string='Hasta', required=True, default=_default_date_end)
+    company_id = fields.Many2one('res.company', string='Compañía', required=True,
+                                 default=lambda self: self.env.company)
 
     @api.constrains('date_start', 'date_end')
     def _check_dates(self):
@@ -46,8 +64,11 @@ class CommissionReportWizard(models.TransientModel):
     )
 
     # ========= KPIs / Totales =========
-    commission_percent = fields.Float(string='Porcentaje Comisión (Equipo)', digits=(16, 2), compute='_compute_totals')
+    commission_percent = fields.Float(string='Porcentaje Comisión', digits=(16, 2), compute='_compute_totals')
     lines_count = fields.Integer(string='Líneas', compute='_compute_totals')
+    # Tamaño de la página cargada en line_ids (LINES_PAGE_SIZE) y si el rango la excede
+    lines_page_size = fields.Integer(string='Líneas cargadas', compute='_compute_lines_page')
+    lines_truncated = fields.Boolean(compute='_compute_lines_page')
     amount_total = fields.Float(string='Total Ventas (Base)', digits=(16, 2),
                                 currency_field='currency_id', compute='_compute_totals')
     commission_total = fields.Float(string='Total Comisión', digits=(16, 2),
@@ -67,15 +88,61 @@ class CommissionReportWizard(models.TransientModel):
             ('move_type', '=', 'out_invoice'),
             ('state', '=', 'posted'),
             ('payment_state', '=', 'paid'),
+            ('company_id', '=', self.company_id.id),
             ('invoice_user_id', '=', self.user_id.id),
             ('invoice_date', '>=', self.date_start),
             ('invoice_date', '<=', self.date_end),
         ]
 
+    def _entries_domain(self):
+        """Dominio sobre commission.payment.entry equivalente a _moves_domain + filtro de pago."""
+        self.ensure_one()
+        domain = [
+            ('salesperson_id', '=', self.user_id.id),
+            ('move_id.move_type', '=', 'out_invoice'),
+            ('move_id.state', '=', 'posted'),
+            ('move_id.payment_state', '=', 'paid'),
+            ('move_id.company_id', '=', self.company_id.id),
+            ('move_id.invoice_user_id', '=', self.user_id.id),
+            ('invoice_date', '>=', self.date_start),
+            ('invoice_date', '<=', self.date_end),
+        ]
+        if self.filter_payment == 'paid':
+            domain.append(('commission_paid', '=', True))
+        elif self.filter_payment == 'unpaid':
+            domain.append(('commission_paid', '=', False))
+        return domain
+
+    def _ensure_entries(self):
+        """Crea las entradas de pago faltantes del rango con un anti-join (solo IDs, sin leer facturas)."""
+        self.ensure_one()
+        Entry = self.env['commission.payment.entry']
+        Entry.flush_model(['move_id', 'salesperson_id'])
+        query = self.env['account.move']._search(self._moves_domain())
+        subquery, params = query.subselect()
+        self.env.cr.execute("""
+            SELECT am_id FROM (%s) AS moves(am_id)
+             WHERE NOT EXISTS (
+                   SELECT 1 FROM commission_payment_entry cpe
+                    WHERE cpe.move_id = moves.am_id AND cpe.salesperson_id = %%s)
+        """ % subquery, params + [self.user_id.id])
+        missing_ids = [row[0] for row in self.env.cr.fetchall()]
+        if missing_ids:
+            Entry.create([{'move_id': mid, 'salesperson_id': self.user_id.id} for mid in missing_ids])
+
+    def _result_cache_key(self, kind, *parts):
+        """Llave de la caché de resultados: vendedor primero (invalidación), luego quién
+        consulta y con qué compañías (las reglas de registro cambian el resultado)."""
+        self.ensure_one()
+        return (self.user_id.id, kind, self.env.uid, tuple(sorted(self.env.companies.ids))) + parts
+
     def _iter_moves_with_entries(self, create_missing=True):
         """Devuelve pares (move, entry) de forma eficiente.
         - create_missing=True  -> crea entries faltantes (para UI)
         - create_missing=False -> NO crea (para PDF), evita escrituras en reporte
+
+        Siempre consulta la BD (sin caché de resultados): lo usan el PDF y el pago
+        masivo, que no pueden trabajar con un conjunto de facturas de otro proceso.
         """
         self.ensure_one()
         Move = self.env['account.move']
@@ -93,14 +160,7 @@ class CommissionReportWizard(models.TransientModel):
         ])
         entry_by_move = {e.move_id.id: e for e in entries}
 
-        # 3) Normaliza legacy en lote (si aplica)
-        legacy_map = {'efect': 'efectivo', 'trans': 'transferencia'}
-        legacy_to_fix = entries.filtered(lambda e: e.payment_method in legacy_map)
-        if legacy_to_fix:
-            for e in legacy_to_fix:
-                e.payment_method = legacy_map[e.payment_method]
-
-        # 4) Crea en bloque SOLO si se pide (UI); nunca en el PDF
+        # 3) Crea en bloque SOLO si se pide (UI); nunca en el PDF
         if create_missing:
             missing_ids = [mid for mid in moves.ids if mid not in entry_by_move]
             if missing_ids:
@@ -110,7 +170,7 @@ class CommissionReportWizard(models.TransientModel):
                 } for mid in missing_ids])
                 entry_by_move.update({e.move_id.id: e for e in new_entries})
 
-        # 5) Ensambla pares en el mismo orden de 'moves'
+        # 4) Ensambla pares en el mismo orden de 'moves'
         return [(m, entry_by_move.get(m.id)) for m in moves if entry_by_move.get(m.id)]
 
     def _filter_pair_by_selection(self, pair):
@@ -125,25 +185,35 @@ class CommissionReportWizard(models.TransientModel):
 
     # ----------------- CARGA DE LÍNEAS (UI) -----------------
 
+    @profiled
     def _load_lines(self):
-        """Reconstruye la tabla en UI respetando el filtro y creando entries faltantes."""
+        """Carga en UI solo la primera página; el total sale de un COUNT y el resto se
+        consulta paginado (``action_open_entries``) sobre commission.payment.entry."""
+        Entry = self.env['commission.payment.entry']
         for rec in self:
             if not (rec.user_id and rec.date_start and rec.date_end):
                 continue
-
-            pairs = rec._iter_moves_with_entries(create_missing=True)
-            # Aplica el filtro actual del wizard
-            pairs = [p for p in pairs if rec._filter_pair_by_selection(p)]
-
+            # create/onchange/guardar/actualizar repiten la misma carga: se memoriza la página
+            # (solo esta carga interactiva; PDF, exportación y pago masivo van a la BD)
+            cache_key = rec._result_cache_key(
+                'page', rec.company_id.id, rec.date_start, rec.date_end, rec.filter_payment,
+            )
+            page = cache_get(rec.env, cache_key)
+            if page is None:
+                rec._ensure_entries()
+                entries = Entry.search(rec._entries_domain(), order='invoice_date asc, id asc', limit=LINES_PAGE_SIZE)
+                page = [(entry.move_id.id, entry.id) for entry in entries]
+                cache_set(rec.env, cache_key, page)
             rec.line_ids = [(5, 0, 0)] + [
                 (0, 0, {
-                    'move_id': m.id,
-                    'payment_entry_id': entry.id,
+                    'move_id': move_id,
+                    'payment_entry_id': entry_id,
                 })
-                for (m, entry) in pairs
+                for move_id, entry_id in page
             ]
 
     @api.model_create_multi
+    @profiled
     def create(self, vals_list):
         """Asegura que, al crearse el wizard en servidor (al pulsar cualquier botón), las líneas ya queden cargadas."""
         recs = super().create(vals_list)
@@ -155,22 +225,44 @@ class CommissionReportWizard(models.TransientModel):
                 pass
         return recs
 
-    @api.onchange('user_id', 'date_start', 'date_end', 'filter_payment')
+    @api.onchange('user_id', 'company_id', 'date_start', 'date_end', 'filter_payment')
+    @profiled
     def _onchange_any_filter(self):
         self._load_lines()
 
     # ----------------- TOTALES / KPIs -----------------
 
-    @api.depends('user_id', 'line_ids', 'line_ids.amount_untaxed', 'line_ids.commission_amount')
+    @api.depends('user_id', 'company_id', 'date_start', 'date_end', 'filter_payment', 'line_ids.payment_method')
+    @profiled
     def _compute_totals(self):
+        """KPIs desde el resumen por vendedor/periodo: no dependen de las líneas del wizard."""
+        Summary = self.env['commission.salesperson.summary']
+        Rate = self.env['commission.rate']
+        for rec in self:
+            if not (rec.user_id and rec.date_start and rec.date_end):
+                rec.commission_percent = 0.0
+                rec.lines_count = 0
+                rec.amount_total = 0.0
+                rec.commission_total = 0.0
+                continue
+            totals = Summary._get_totals(
+                rec.user_id, rec.date_start, rec.date_end, rec.filter_payment, company=rec.company_id,
+            )
+            # Porcentaje vigente al cierre del periodo (historial de tasas, no el actual del equipo)
+            rec.commission_percent = Rate._get_percent(rec.user_id, rec.date_end, rec.company_id)
+            rec.lines_count = totals['invoice_count']
+            rec.amount_total = totals['amount_base']
+            rec.commission_total = totals['commission_total']
+
+    @api.depends('lines_count')
+    def _compute_lines_page(self):
         for rec in self:
-            rec.commission_percent = rec.user_id.sale_team_id.commission_percent if rec.user_id and rec.user_id.sale_team_id else 0.0
-            rec.lines_count = len(rec.line_ids)
-            rec.amount_total = sum(rec.line_ids.mapped('amount_untaxed')) if rec.line_ids else 0.0
-            rec.commission_total = sum(rec.line_ids.mapped('commission_amount')) if rec.line_ids else 0.0
+            rec.lines_page_size = LINES_PAGE_SIZE
+            rec.lines_truncated = rec.lines_count > LINES_PAGE_SIZE
 
     # ----------------- ACCIONES -----------------
 
+    @profiled
     def action_refresh(self):
         self.ensure_one()
         self._load_lines()
@@ -182,6 +274,23 @@ class CommissionReportWizard(models.TransientModel):
             'target': 'new',
         }
 
+    @profiled
+    def action_open_entries(self):
+        """Lista paginada (orden y filtros en SQL) de todas las facturas del rango."""
+        self.ensure_one()
+        self._ensure_entries()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Comisiones de %s' % (self.user_id.name or ''),
+            'res_model': 'commission.payment.entry',
+            'view_mode': 'tree',
+            'views': [(self.env.ref('crm_commission.view_commission_payment_entry_tree').id, 'tree')],
+            'search_view_id': self.env.ref('crm_commission.view_commission_payment_entry_search').id,
+            'domain': self._entries_domain(),
+            'target': 'current',
+        }
+
+    @profiled
     def action_save(self):
         self.ensure_one()
         self.flush()
@@ -197,26 +306,27 @@ class CommissionReportWizard(models.TransientModel):
             }
         }
 
-    def action_print_pdf(self):
-        """Renderiza el PDF en servidor (sin /report/pdf) y dispara descarga directa."""
+    def _prepare_report_data(self):
+        """Datos del PDF (solo entradas existentes). None si no hay facturas en el rango/filtro."""
         self.ensure_one()
 
         # Solo entradas existentes (no crear al generar PDF)
         pairs = self._iter_moves_with_entries(create_missing=False)
         pairs = [p for p in pairs if self._filter_pair_by_selection(p)]
         if not pairs:
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': 'Reporte vacío',
-                    'message': 'No hay facturas en el rango/filtro seleccionado.',
-                    'sticky': False,
-                    'type': 'warning',
-                }
-            }
+            return None
+
+        return self._report_data_from_pairs(
+            pairs, self.user_id, self.date_start, self.date_end, self.filter_payment,
+            self.commission_percent, self.currency_id or self.env.company.currency_id,
+        )
 
-        currency = self.currency_id or self.env.company.currency_id
+    @api.model
+    def _report_data_from_pairs(self, pairs, user, date_start, date_end, filter_payment, commission_percent, currency):
+        """Arma el dict ``data`` de la plantilla a partir de pares (factura, entrada de pago).
+
+        Compartido por el wizard y por las corridas por equipo (commission.batch.run).
+        """
         decimals = int(getattr(currency, 'decimal_places', 2) or 2)
 
         def money_str(amount):
@@ -251,49 +361,196 @@ class CommissionReportWizard(models.TransientModel):
                 'commission_paid': 'Sí' if entry and entry.payment_method else 'No',
             })
 
-        ds = self.date_start.strftime('%d/%m/%Y') if self.date_start else ''
-        de = self.date_end.strftime('%d/%m/%Y') if self.date_end else ''
+        ds = date_start.strftime('%d/%m/%Y') if date_start else ''
+        de = date_end.strftime('%d/%m/%Y') if date_end else ''
 
-        data = {
-            'user_name': self.user_id.name,
+        return {
+            'user_name': user.name,
             'date_start_str': ds,
             'date_end_str': de,
-            'filter_payment': self.filter_payment,
+            'filter_payment': filter_payment,
             'commission_total': commission_total,
             'commission_total_str': money_str(commission_total),
             'amount_total': amount_total,
             'amount_total_str': money_str(amount_total),
-            'commission_percent': self.commission_percent,
-            'commission_percent_str': f"{(self.commission_percent or 0.0):.2f}",
+            'commission_percent': commission_percent,
+            'commission_percent_str': f"{(commission_percent or 0.0):.2f}",
             'invoice_lines': invoice_lines,
-            'currency': currency,
         }
 
+    @api.model
+    def _report_cache_key(self, data):
+        """Huella sha256 de los datos del reporte (incluye forma/fecha/estado de pago de cada línea)."""
+        payload = json.dumps(
+            [REPORT_CACHE_VERSION, self.env.user.lang or 'es_MX', data],
+            sort_keys=True, default=str, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _render_report_pdf(self, data):
         # Render QWeb PDF en servidor (sin assets extra/HTTP adicional)
+        self.ensure_one()
         Report = self.env['ir.actions.report'].sudo().with_context(
             lang=self.env.user.lang or 'es_MX',
             no_abbrev=True,                  # menos procesamiento de cantidades
             discard_logo_check=True,         # evita chequeos extra de logo
         )
         pdf_bytes, _ = Report._render_qweb_pdf('crm_commission.action_commission_report_pdf', [self.id], data=data)
+        return pdf_bytes
 
-        # Crear attachment y devolver descarga directa
-        fname = f"reporte_comisiones_{(self.user_id.name or '').replace(' ', '_')}_{fields.Datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        attachment = self.env['ir.attachment'].create({
-            'name': fname,
+    def _get_report_filename(self):
+        self.ensure_one()
+        return f"reporte_comisiones_{(self.user_id.name or '').replace(' ', '_')}_{fields.Datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+
+    @api.model
+    def _report_cache_name(self, key):
+        return REPORT_CACHE_PREFIX + key
+
+    def _find_report_attachment(self, key):
+        """PDF ya generado con la misma huella o vacío.
+
+        Si pertenece a otro wizard se copia para éste (el filestore deduplica por
+        checksum, no se duplica el archivo); el del otro wizard no se toca.
+        """
+        self.ensure_one()
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('name', '=', self._report_cache_name(key)),
+        ], limit=1, order='id desc')
+        if attachment and attachment.res_id != self.id:
+            attachment = attachment.copy({'res_id': self.id, 'raw': attachment.raw})
+        return attachment
+
+    def _get_report_attachment(self, data):
+        """Adjunto PDF para ``data``: reutiliza uno idéntico si existe, si no renderiza.
+
+        La llave (sha256 de los datos) es el nombre del adjunto. Si el adjunto
+        encontrado pertenece a otro wizard se copia para éste, así es descargable y
+        se borra junto con este wizard.
+        """
+        self.ensure_one()
+        key = self._report_cache_key(data)
+        attachment = self._find_report_attachment(key)
+        if attachment:
+            return attachment
+
+        pdf_bytes = self._render_report_pdf(data)
+        return self.env['ir.attachment'].sudo().create({
+            'name': self._report_cache_name(key),
             'type': 'binary',
             'datas': base64.b64encode(pdf_bytes),
             'mimetype': 'application/pdf',
             'res_model': self._name,
             'res_id': self.id,
         })
+
+    @profiled
+    def action_print_pdf(self):
+        """Renderiza el PDF en servidor (sin /report/pdf) y dispara descarga directa."""
+        self.ensure_one()
+        data = self._prepare_report_data()
+        if not data:
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': 'Reporte vacío',
+                    'message': 'No hay facturas en el rango/filtro seleccionado.',
+                    'sticky': False,
+                    'type': 'warning',
+                }
+            }
+
+        # Reportes grandes: a la cola (si el modo asíncrono está activo y no hay PDF en caché)
+        Job = self.env['commission.report.job']
+        line_count = len(data['invoice_lines'])
+        if Job._should_enqueue(line_count) and not self._find_report_attachment(self._report_cache_key(data)):
+            job = Job._enqueue(
+                'crm_commission.action_commission_report_pdf',
+                'Comisiones %s (%s - %s)' % (data['user_name'], data['date_start_str'], data['date_end_str']),
+                self._get_report_filename(), data, line_count,
+            )
+            return Job._enqueued_notification(job)
+
+        attachment = self._get_report_attachment(data)
+        return {
+            'type': 'ir.actions.act_url',
+            # El nombre del adjunto es la llave de caché; la descarga usa el nombre legible
+            'url': f"/web/content/{attachment.id}/{self._get_report_filename()}?download=true",
+            'target': 'self',
+        }
+
+    # ----------------- EXPORTACIÓN (CSV / XLSX) -----------------
+
+    def _iter_export_rows(self, chunk_size=EXPORT_CHUNK_SIZE):
+        """Genera filas para exportar leyendo facturas y pagos por lotes.
+
+        Solo se leen las columnas necesarias y se limpia la caché tras cada lote,
+        de modo que la memoria no crece con el tamaño del rango. No escribe nada.
+        """
+        self.ensure_one()
+        Move = self.env['account.move']
+        Entry = self.env['commission.payment.entry']
+        methods = dict(PAYMENT_METHODS)
+        move_ids = list(Move._search(self._moves_domain(), order='invoice_date asc, name asc, id asc'))
+
+        for start in range(0, len(move_ids), chunk_size):
+            chunk = move_ids[start:start + chunk_size]
+            entries = {
+                e['move_id'][0]: e
+                for e in Entry.search_read(
+                    [('move_id', 'in', chunk), ('salesperson_id', '=', self.user_id.id)],
+                    ['move_id', 'payment_method', 'payment_datetime', 'payment_user_id', 'commission_paid'],
+                )
+            }
+            moves = Move.browse(chunk).read([
+                'name', 'ref', 'invoice_date', 'partner_id',
+                'amount_untaxed', 'commission_percent', 'commission_amount',
+            ])
+            for m in moves:
+                entry = entries.get(m['id']) or {}
+                paid = bool(entry.get('commission_paid'))
+                if (self.filter_payment == 'paid' and not paid) or (self.filter_payment == 'unpaid' and paid):
+                    continue
+                pay_dt = entry.get('payment_datetime')
+                yield [
+                    m['name'] or m['ref'] or '',
+                    m['invoice_date'] and m['invoice_date'].strftime('%d/%m/%Y') or '',
+                    m['partner_id'] and m['partner_id'][1] or '',
+                    m['amount_untaxed'] or 0.0,
+                    m['commission_percent'] or 0.0,
+                    m['commission_amount'] or 0.0,
+                    'Sí' if paid else 'No',
+                    methods.get(entry.get('payment_method'), ''),
+                    pay_dt and fields.Datetime.context_timestamp(self, pay_dt).strftime('%d/%m/%Y %H:%M:%S') or '',
+                    entry.get('payment_user_id') and entry['payment_user_id'][1] or '',
+                ]
+            Move.invalidate_model()
+            Entry.invalidate_model()
+
+    def _get_export_filename(self, ext):
+        self.ensure_one()
+        name = (self.user_id.name or '').replace(' ', '_')
+        return f"reporte_comisiones_{name}_{self.date_start}_{self.date_end}.{ext}"
+
+    def _action_export(self, fmt):
+        self.ensure_one()
         return {
             'type': 'ir.actions.act_url',
-            'url': f"/web/content/{attachment.id}?download=true",
+            'url': f"/crm_commission/commission_report/{self.id}/export/{fmt}",
             'target': 'self',
         }
 
+    @profiled
+    def action_export_csv(self):
+        return self._action_export('csv')
+
+    @profiled
+    def action_export_xlsx(self):
+        return self._action_export('xlsx')
+
     # --------- Botón “Marcar todas como pagadas” ----------
+    @profiled
     def action_mark_all_paid(self):
         """
         Abre el wizard masivo con SOLO las entradas pendientes del rango/usuario actual.
@@ -391,17 +648,6 @@ class CommissionReportWizardLine(models.TransientModel):
             return self.browse()
         return super().create(cleaned)
 
-    def write(self, vals):
-        res = super().write(vals)
-        if 'payment_method' in vals:
-            for line in self:
-                entry = line.payment_entry_id
-                if entry and entry.payment_method and not entry.payment_datetime:
-                    entry.write({
-                        'payment_datetime': fields.Datetime.now(),
-                        'payment_user_id': self.env.user.id,
-                    })
-        return res
 
 
 class CommissionPaymentEntry(models.Model):
@@ -419,6 +665,16 @@ class CommissionPaymentEntry(models.Model):
 
     commission_paid = fields.Boolean(string='Comisión pagada', compute='_compute_paid', store=True)
 
+    # Datos de la factura para la lista paginada (la fecha se almacena: filtro y orden en SQL)
+    invoice_date = fields.Date(related='move_id.invoice_date', string='Fecha Factura', store=True, index=True)
+    partner_id = fields.Many2one(related='move_id.partner_id', string='Cliente')
+    currency_id = fields.Many2one(related='move_id.currency_id')
+    amount_untaxed = fields.Monetary(related='move_id.amount_untaxed', string='Factura sin IVA',
+                                     currency_field='currency_id')
+    commission_percent = fields.Float(related='move_id.commission_percent', string='% Comisión')
+    commission_amount = fields.Monetary(related='move_id.commission_amount', string='Comisión',
+                                        currency_field='currency_id')
+
     _sql_constraints = [
         ('move_salesperson_uniq',
          'unique(move_id, salesperson_id)',
@@ -430,6 +686,83 @@ class CommissionPaymentEntry(models.Model):
         for r in self:
             r.commission_paid = bool(r.payment_method)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        entries = super().create(vals_list)
+        self.env['commission.salesperson.summary']._mark_dirty_entries(entries)
+        invalidate_salespersons(self.env, entries.salesperson_id.ids)
+        return entries
+
+    def write(self, vals):
+        Summary = self.env['commission.salesperson.summary']
+        touches_summary = bool({'payment_method', 'move_id', 'salesperson_id'}.intersection(vals))
+        if touches_summary:
+            Summary._mark_dirty_entries(self)
+            invalidate_salespersons(self.env, self.salesperson_id.ids)
+        res = super().write(vals)
+        if touches_summary:
+            Summary._mark_dirty_entries(self)
+            invalidate_salespersons(self.env, self.salesperson_id.ids)
+        # Elegir forma de pago sella fecha/usuario (si no se indicaron y no había sello)
+        if vals.get('payment_method') and 'payment_datetime' not in vals:
+            unstamped = self.filtered(lambda e: not e.payment_datetime)
+            if unstamped:
+                super(CommissionPaymentEntry, unstamped).write({
+                    'payment_datetime': fields.Datetime.now(),
+                    'payment_user_id': self.env.user.id,
+                })
+        return res
+
+    def unlink(self):
+        self.env['commission.salesperson.summary']._mark_dirty_entries(self)
+        invalidate_salespersons(self.env, self.salesperson_id.ids)
+        return super().unlink()
+
+    def _bulk_mark_paid(self, payment_method, payment_datetime=None, note=None):
+        """Marca como pagadas, en una sola sentencia, solo las entradas pendientes de ``self``.
+
+        Devuelve (entradas afectadas, lote de bitácora).
+        """
+        self.check_access_rights('write')
+        self.check_access_rule('write')
+        payment_datetime = payment_datetime or fields.Datetime.now()
+        self.flush_recordset()
+        self.env.cr.execute("""
+            UPDATE commission_payment_entry
+               SET payment_method = %s,
+                   commission_paid = TRUE,
+                   payment_datetime = %s,
+                   payment_user_id = %s,
+                   note = COALESCE(%s, note),
+                   write_uid = %s,
+                   write_date = (now() at time zone 'UTC')
+             WHERE id = ANY(%s)
+               AND NOT COALESCE(commission_paid, FALSE)
+         RETURNING id
+        """, [payment_method, payment_datetime, self.env.uid, note or None, self.env.uid, self.ids])
+        paid = self.browse([row[0] for row in self.env.cr.fetchall()])
+
+        amount = 0.0
+        if paid:
+            paid.invalidate_recordset([
+                'payment_method', 'commission_paid', 'payment_datetime', 'payment_user_id',
+                'note', 'write_uid', 'write_date',
+            ])
+            self.env['commission.salesperson.summary']._mark_dirty_entries(paid)
+            invalidate_salespersons(self.env, paid.salesperson_id.ids)
+            self.env['account.move'].flush_model(['commission_amount'])
+            self.env.cr.execute("""
+                SELECT COALESCE(sum(am.commission_amount), 0)
+                  FROM commission_payment_entry cpe
+                  JOIN account_move am ON am.id = cpe.move_id
+                 WHERE cpe.id = ANY(%s)
+            """, [paid.ids])
+            amount = self.env.cr.fetchone()[0]
+        batch = self.env['commission.payment.batch']._log(
+            'salesperson', len(self), paid.ids, amount, payment_method, payment_datetime, note,
+        )
+        return paid, batch
+
 
 # --------- Wizard de pago masivo ----------
 class CommissionMassPayWizard(models.TransientModel):
@@ -448,21 +781,12 @@ class CommissionMassPayWizard(models.TransientModel):
                                        default=lambda self: fields.Datetime.now())
     note = fields.Char(string='Nota (opcional)')
 
+    @profiled
     def action_confirm(self):
         self.ensure_one()
 
-        vals = {
-            'payment_method': self.payment_method,
-            'payment_datetime': self.payment_datetime,
-            'payment_user_id': self.env.user.id,
-        }
-        if self.note:
-            vals['note'] = self.note
-
-        # Marca SOLO los no pagados (por seguridad)
-        to_write = self.entry_ids.filtered(lambda e: not e.commission_paid)
-        if to_write:
-            to_write.write(vals)
+        # Una sola sentencia: solo toca los no pagados y deja un lote en la bitácora
+        self.entry_ids._bulk_mark_paid(self.payment_method, self.payment_datetime, self.note)
 
         # Reabrir/refrescar el wizard padre con datos y KPIs cargados
         parent_id = self.env.context.get('parent_wizard_id')
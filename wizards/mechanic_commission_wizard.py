@@ -8,8 +8,11 @@
 # ║  Licencia completa: https://www.gnu.org/licenses/lgpl-3.0.html   ║
 # ╚══════════════════════════════════════════════════════════════════╝
 
-from odoo import models, fields, api
-from datetime import datetime
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from ..models.commission_payment_batch import PAYMENT_METHODS
+from ..models.commission_profile import profiled
+from datetime import datetime, date, timedelta
 import calendar
 import re  # para _get_report_base_filename
 
@@ -19,6 +22,23 @@ MONTHS = [
     ('09', 'Septiembre'), ('10', 'Octubre'), ('11', 'Noviembre'), ('12', 'Diciembre')
 ]
 
+PERIOD_TYPES = [
+    ('month', 'Mes'),
+    ('fortnight', 'Quincena'),
+    ('week', 'Semana ISO'),
+    ('quarter', 'Trimestre'),
+    ('range', 'Rango de fechas'),
+]
+
+QUARTERS = [('1', 'T1 (Ene-Mar)'), ('2', 'T2 (Abr-Jun)'), ('3', 'T3 (Jul-Sep)'), ('4', 'T4 (Oct-Dic)')]
+
+# Líneas que se cargan en el wizard; el resto se consulta paginado sobre mechanic.commission.entry
+LINES_PAGE_SIZE = 80
+
+# Campos editables de la línea que en realidad viven en mechanic.commission.entry
+LINE_ENTRY_FIELDS = ('is_paid', 'pago_comision')
+
+
 class MechanicCommissionWizard(models.TransientModel):
     _name = "mechanic.commission.wizard"
     _description = "Wizard: Comisiones de mecánicos por mes (facturas pagadas)"
@@ -43,11 +63,32 @@ class MechanicCommissionWizard(models.TransientModel):
         default=lambda self: str(datetime.now().year),
     )
 
+    # ---- Periodo: mes (por defecto), quincena de nómina, semana ISO, trimestre o rango ----
+    period_type = fields.Selection(PERIOD_TYPES, string="Periodo", required=True, default='month')
+    fortnight = fields.Selection(
+        [('1', '1ª quincena (1-15)'), ('2', '2ª quincena (16-fin de mes)')],
+        string="Quincena",
+        default=lambda self: '1' if datetime.now().day <= 15 else '2',
+    )
+    iso_week = fields.Integer(string="Semana ISO", default=lambda self: datetime.now().isocalendar()[1])
+    quarter = fields.Selection(
+        QUARTERS,
+        string="Trimestre",
+        default=lambda self: str((datetime.now().month - 1) // 3 + 1),
+    )
+    date_from = fields.Date(string="Desde")
+    date_to = fields.Date(string="Hasta")
+    period_start = fields.Date(string="Inicio del periodo", compute="_compute_period_bounds")
+    period_end = fields.Date(string="Fin del periodo", compute="_compute_period_bounds")
+
     services_count = fields.Integer(
         string="Servicios (líneas)",
-        compute="_compute_totals",
+        compute="_compute_services_count",
         store=False,
     )
+    # Tamaño de la página cargada en line_ids (LINES_PAGE_SIZE) y si el periodo la excede
+    lines_page_size = fields.Integer(string="Líneas cargadas", compute="_compute_lines_page", store=False)
+    lines_truncated = fields.Boolean(compute="_compute_lines_page", store=False)
     total_hours = fields.Float(
         string="Horas totales",
         compute="_compute_totals",
@@ -95,38 +136,101 @@ class MechanicCommissionWizard(models.TransientModel):
 
     # --- PERSISTENCIA de lo editado en líneas (forma de pago, pagado, metadata) ---
     def _inverse_line_ids(self):
+        """Solo escribe las entradas cuyo estado difiere de la línea, agrupadas por valores."""
+        changes = []
         for w in self:
             for line in w.line_ids:
                 entry = line.commission_entry_id
                 if not entry:
                     continue
-
+                # Elegir forma de pago implica pagado
+                is_paid = bool(line.is_paid or line.pago_comision)
                 vals = {}
-                # Si el usuario eligió forma de pago, forzar pagado + metadata
-                if line.pago_comision:
-                    vals.update({
-                        'pago_comision': line.pago_comision,
-                        'is_paid': True,
-                        'paid_date': fields.Datetime.now(),
-                        'paid_by': self.env.user.id,
-                    })
-                # Si tocó explícitamente el check de pagado (por edición inline)
-                if line.is_paid and not entry.is_paid:
-                    vals.setdefault('is_paid', True)
-                    vals.setdefault('paid_date', fields.Datetime.now())
-                    vals.setdefault('paid_by', self.env.user.id)
-                elif (not line.is_paid) and entry.is_paid:
-                    vals.update({'is_paid': False, 'paid_date': False, 'paid_by': False})
-
+                if is_paid != entry.is_paid:
+                    vals['is_paid'] = is_paid
+                if line.pago_comision and line.pago_comision != entry.pago_comision:
+                    vals['pago_comision'] = line.pago_comision
                 if vals:
-                    entry.write(vals)
+                    changes.append((entry, vals))
+        self.env['mechanic.commission.entry']._write_grouped(changes)
+
+    @api.model_create_multi
+    @profiled
+    def create(self, vals_list):
+        # El primer guardado del formulario llega aquí con las líneas como (0, 0, vals)
+        changes = []
+        for vals in vals_list:
+            if vals.get('line_ids'):
+                line_cmds, line_changes = self._split_line_commands(vals['line_ids'])
+                vals['line_ids'] = line_cmds
+                changes += line_changes
+        self.env['mechanic.commission.entry']._write_grouped(changes)
+        return super().create(vals_list)
+
+    @profiled
+    def write(self, vals):
+        if vals.get('line_ids'):
+            line_cmds, changes = self._split_line_commands(vals['line_ids'])
+            self.env['mechanic.commission.entry']._write_grouped(changes)
+            vals = dict(vals, line_ids=line_cmds)
+        return super().write(vals)
+
+    @api.model
+    def _split_line_commands(self, commands):
+        """Saca de los comandos ``(0, 0, vals)`` / ``(1, id, vals)`` los cambios de pago de las
+        líneas para aplicarlos a las entradas en pocas escrituras agrupadas (en vez de una o
+        dos por línea). Devuelve (comandos restantes, [(entrada, vals)]).
+
+        El cliente manda todos los campos editables de cada línea: solo se conservan los
+        que difieren de la entrada, para no re-sellar pagos ya registrados.
+        """
+        Line = self.env['mechanic.commission.wizard.line']
+        Entry = self.env['mechanic.commission.entry']
+        remaining = []
+        pending_new = []
+        pending_lines = []
+        for command in commands:
+            if command[0] not in (0, 1) or not isinstance(command[2], dict):
+                remaining.append(command)
+                continue
+            line_vals = dict(command[2])
+            entry_vals = {f: line_vals.pop(f) for f in LINE_ENTRY_FIELDS if f in line_vals}
+            if command[0] == 0:
+                if entry_vals and line_vals.get('commission_entry_id'):
+                    pending_new.append((line_vals['commission_entry_id'], entry_vals))
+                else:
+                    line_vals.update(entry_vals)
+                remaining.append((0, command[1], line_vals))
+                continue
+            if entry_vals:
+                pending_lines.append((command[1], entry_vals))
+            if line_vals:
+                remaining.append((1, command[1], line_vals))
+
+        entry_ids = [entry_id for entry_id, _vals in pending_new]
+        lines = Line.browse([line_id for line_id, _vals in pending_lines])
+        entry_by_line = {line.id: line.commission_entry_id.id for line in lines}
+        entry_ids += list(entry_by_line.values())
+        # Una sola lectura del estado de pago de todas las entradas involucradas
+        entries = {entry.id: entry for entry in Entry.browse(entry_ids)}
+        changes = []
+        for entry_id, vals in pending_new + [
+            (entry_by_line.get(line_id), vals) for line_id, vals in pending_lines
+        ]:
+            entry = entries.get(entry_id)
+            vals = entry and entry._line_payment_changes(vals)
+            if vals:
+                changes.append((entry, vals))
+        return remaining, changes
 
     # Botón "Guardar cambios": NO 'reload' (cierra modal). Reabre el MISMO wizard.
+    @profiled
     def action_save_lines(self):
         self.ensure_one()
         self._inverse_line_ids()      # persiste pagos/forma/metadata
         self._onchange_build_lines()  # reconstruye el O2M con los entries actuales
         self._compute_totals()        # recalcula KPIs ya mismo
+        self._compute_services_count()
 
         # Mantiene el modal abierto y evita cierres
         return {
@@ -170,44 +274,167 @@ class MechanicCommissionWizard(models.TransientModel):
 
     # >>>>>> Calcula KPIs leyendo mechanic.commission.entry (robusto) y respeta el filtro <<<<<<
     @api.depends(
-        'employee_id', 'month', 'year', 'report_paid_filter',
+        'employee_id', 'month', 'year', 'period_type', 'fortnight', 'iso_week', 'quarter',
+        'date_from', 'date_to', 'report_paid_filter',
         'line_ids', 'line_ids.is_paid', 'line_ids.pago_comision'
     )
+    @profiled
     def _compute_totals(self):
         Entry = self.env['mechanic.commission.entry']
         for w in self:
-            if not (w.employee_id and w.month and w.year):
-                w.services_count = 0
+            if not (w.employee_id and w._has_period()):
                 w.total_hours = 0.0
                 w.payout_total = 0.0
                 w.amount_invoiced = 0.0
                 continue
 
-            year = int(w.year)
-            month = int(w.month)
-            last_day = calendar.monthrange(year, month)[1]
-            date_start = f"{year}-{str(month).zfill(2)}-01"
-            date_end = f"{year}-{str(month).zfill(2)}-{last_day}"
-
-            dom = [
-                ('employee_id', '=', w.employee_id.id),
-                ('invoice_date', '>=', date_start),
-                ('invoice_date', '<=', date_end),
-            ]
-            entries = Entry.search(dom)
-            if w.report_paid_filter == 'paid':
-                entries = entries.filtered(lambda e: e.is_paid)
-            elif w.report_paid_filter == 'unpaid':
-                entries = entries.filtered(lambda e: not e.is_paid)
-
-            w.services_count = len(entries)
-            w.total_hours = sum(entries.mapped('hours') or [0.0])
-            w.payout_total = sum(entries.mapped('payout') or [0.0])
-            w.amount_invoiced = sum(entries.mapped('subtotal_customer') or [0.0])
+            # Mes calendario: una fila del resumen mensual
+            if w.period_type == 'month':
+                kpis = w._get_month_kpis()
+                w.total_hours = kpis['total_hours']
+                w.payout_total = kpis['payout_total']
+                w.amount_invoiced = kpis['amount_invoiced']
+                continue
+
+            # Otros periodos: una sola agregación en SQL (filtro de pagado dentro del dominio)
+            groups = Entry.read_group(
+                w._entries_domain(),
+                ['hours:sum', 'payout:sum', 'subtotal_customer:sum'],
+                [],
+            )
+            res = groups[0] if groups else {}
+            w.total_hours = res.get('hours') or 0.0
+            w.payout_total = res.get('payout') or 0.0
+            w.amount_invoiced = res.get('subtotal_customer') or 0.0
 
+    # Conteo aparte: solo un COUNT(*) cuando únicamente se pide el número de servicios
+    @api.depends(
+        'employee_id', 'month', 'year', 'period_type', 'fortnight', 'iso_week', 'quarter',
+        'date_from', 'date_to', 'report_paid_filter',
+        'line_ids', 'line_ids.is_paid', 'line_ids.pago_comision'
+    )
+    @profiled
+    def _compute_services_count(self):
+        Entry = self.env['mechanic.commission.entry']
+        for w in self:
+            if not (w.employee_id and w._has_period()):
+                w.services_count = 0
+                continue
+            if w.period_type == 'month':
+                w.services_count = w._get_month_kpis()['services_count']
+                continue
+            w.services_count = Entry.search_count(w._entries_domain())
+
+    @api.depends('services_count')
+    def _compute_lines_page(self):
+        for w in self:
+            w.lines_page_size = LINES_PAGE_SIZE
+            w.lines_truncated = w.services_count > LINES_PAGE_SIZE
+
+    def _get_month_kpis(self):
+        # Solo lectura: la cola del ledger y la de resúmenes se procesan en precommit
+        self.ensure_one()
+        return self.env['mechanic.commission.summary']._get_kpis(
+            self.employee_id, self.year, self.month, paid_filter=self.report_paid_filter,
+            company=self.env.company,
+        )
+
+    # ----------------- PERIODOS -----------------
+
+    def _has_period(self):
+        self.ensure_one()
+        if self.period_type == 'range':
+            return bool(self.date_from and self.date_to)
+        if self.period_type == 'week':
+            try:
+                date.fromisocalendar(int(self.year), self.iso_week or 0, 1)
+            except (TypeError, ValueError):
+                return False
+            return True
+        if self.period_type == 'quarter':
+            return bool(self.year and self.quarter)
+        return bool(self.year and self.month)
+
+    def _get_period_bounds(self):
+        """(fecha inicial, fecha final) inclusivas del periodo seleccionado."""
+        self.ensure_one()
+        if self.period_type == 'range':
+            return self.date_from, self.date_to
+
+        year = int(self.year)
+        if self.period_type == 'week':
+            start = date.fromisocalendar(year, self.iso_week or 1, 1)
+            return start, start + timedelta(days=6)
+        if self.period_type == 'quarter':
+            first_month = (int(self.quarter or '1') - 1) * 3 + 1
+            last_month = first_month + 2
+            return (date(year, first_month, 1),
+                    date(year, last_month, calendar.monthrange(year, last_month)[1]))
+
+        month = int(self.month)
+        last_day = calendar.monthrange(year, month)[1]
+        if self.period_type == 'fortnight':
+            if self.fortnight == '2':
+                return date(year, month, 16), date(year, month, last_day)
+            return date(year, month, 1), date(year, month, 15)
+        return date(year, month, 1), date(year, month, last_day)
+
+    def _get_period_label(self):
+        """Texto del periodo para encabezados y PDF."""
+        self.ensure_one()
+        if self.period_type == 'month':
+            return f"{dict(MONTHS).get(self.month, '')} {self.year or ''}".strip()
+        start, end = self._get_period_bounds()
+        if self.period_type == 'week':
+            prefix = f"Semana {self.iso_week} / {self.year}: "
+        elif self.period_type == 'quarter':
+            prefix = f"T{self.quarter} {self.year}: "
+        elif self.period_type == 'fortnight':
+            prefix = f"{self.fortnight}ª quincena {dict(MONTHS).get(self.month, '')} {self.year}: "
+        else:
+            prefix = ""
+        return f"{prefix}{start.strftime('%d/%m/%Y')} - {end.strftime('%d/%m/%Y')}"
+
+    @api.depends('period_type', 'month', 'year', 'fortnight', 'iso_week', 'quarter', 'date_from', 'date_to')
+    def _compute_period_bounds(self):
+        for w in self:
+            start, end = w._get_period_bounds() if w._has_period() else (False, False)
+            w.period_start = start
+            w.period_end = end
+
+    @api.constrains('period_type', 'iso_week', 'year', 'date_from', 'date_to')
+    def _check_period(self):
+        for w in self:
+            if w.period_type == 'week' and w.year:
+                try:
+                    date.fromisocalendar(int(w.year), w.iso_week or 0, 1)
+                except ValueError:
+                    raise ValidationError(_("La semana ISO %s no existe en %s.") % (w.iso_week, w.year))
+            if w.period_type == 'range' and w.date_from and w.date_to and w.date_to < w.date_from:
+                raise ValidationError(_("La fecha final no puede ser menor que la fecha inicial."))
+
+    def _entries_domain(self, paid_filter=True):
+        """Dominio de entradas del mecánico/periodo (y filtro de pago si aplica).
+
+        Solo la compañía actual: el mismo alcance que los KPI del mes (resumen por compañía).
+        """
+        self.ensure_one()
+        date_start, date_end = self._get_period_bounds()
+        dom = [
+            ('company_id', '=', self.env.company.id),
+            ('employee_id', '=', self.employee_id.id),
+            ('invoice_date', '>=', date_start),
+            ('invoice_date', '<=', date_end),
+        ]
+        if paid_filter and self.report_paid_filter == 'paid':
+            dom.append(('is_paid', '=', True))
+        elif paid_filter and self.report_paid_filter == 'unpaid':
+            dom.append(('is_paid', '=', False))
+        return dom
+
+    @profiled
     def action_print_pdf(self):
         self.ensure_one()
-        self._compute_totals()
 
         cur = self.currency_id or self.env.company.currency_id
         decimals = int(getattr(cur, "decimal_places", 2) or 2)
@@ -219,12 +446,9 @@ class MechanicCommissionWizard(models.TransientModel):
             val = f"{(x or 0.0):.{decimals}f}"
             return f"{cur.symbol} {val}" if (getattr(cur, "position", "after") == "before") else f"{val} {cur.symbol}"
 
-        # Aplica filtro para el PDF sobre las líneas del wizard
-        line_records = self.line_ids
-        if self.report_paid_filter == 'paid':
-            line_records = line_records.filtered(lambda r: bool(r.is_paid))
-        elif self.report_paid_filter == 'unpaid':
-            line_records = line_records.filtered(lambda r: not bool(r.is_paid))
+        # Todas las entradas del periodo con el filtro del PDF (no solo la página cargada en el wizard)
+        Entry = self.env['mechanic.commission.entry']
+        line_records = Entry.search(self._entries_domain(), order='invoice_date asc, id asc')
 
         # KPIs recalculados para el PDF según el filtro
         services_count_pdf = len(line_records)
@@ -253,12 +477,23 @@ class MechanicCommissionWizard(models.TransientModel):
             "month": self.month or "",
             "month_name": month_name,
             "year": self.year or "",
+            "period_label": self._get_period_label(),
             "services_count": int(services_count_pdf or 0),
             "total_hours": _num(total_hours_pdf, 2),
             "amount_invoiced": _money(amount_invoiced_pdf),
             "payout_total": _money(payout_total_pdf),
             "lines": lines,
         }
+        # Reportes grandes: a la cola si el modo asíncrono está activo
+        Job = self.env['commission.report.job']
+        if Job._should_enqueue(len(lines)):
+            job = Job._enqueue(
+                'crm_commission.action_mechanic_commission_report',
+                'Comisiones mecánico %s (%s)' % (data['employee_name'], data['period_label']),
+                'comisiones_mecanico_%s.pdf' % (self.employee_id.name or '').replace(' ', '_'),
+                data, len(lines),
+            )
+            return Job._enqueued_notification(job)
         return self.env.ref('crm_commission.action_mechanic_commission_report').report_action(self, data=data)
 
     @api.depends("month")
@@ -268,104 +503,77 @@ class MechanicCommissionWizard(models.TransientModel):
             w.month_name = sel.get(w.month or "", "")
 
     # ÚNICO lugar que construye line_ids (blindado y por registro)
-    @api.onchange('employee_id', 'month', 'year')
+    @api.onchange('employee_id', 'month', 'year', 'period_type', 'fortnight', 'iso_week',
+                  'quarter', 'date_from', 'date_to')
+    @profiled
     def _onchange_build_lines(self):
         for w in self:
             lines_cmds = []
 
-            if not (w.employee_id and w.month and w.year):
+            if not (w.employee_id and w._has_period()):
                 w.line_ids = [(5, 0, 0)]
                 continue
 
-            year = int(w.year)
-            month = int(w.month)
-            last_day = calendar.monthrange(year, month)[1]
-            date_start = f"{year}-{str(month).zfill(2)}-01"
-            date_end = f"{year}-{str(month).zfill(2)}-{last_day}"
-
-            # FACTURAS DEL CLIENTE pagadas
-            moves = w.env['account.move'].search([
-                ('move_type', '=', 'out_invoice'),
-                ('state', '=', 'posted'),
-                ('payment_state', '=', 'paid'),
-                ('invoice_date', '>=', date_start),
-                ('invoice_date', '<=', date_end),
-            ])
-
-            # LÍNEAS DE SERVICIO DEL mecánico seleccionado
-            inv_lines = moves.mapped('invoice_line_ids').filtered(
-                lambda l: l.product_id.type == 'service'
-                          and getattr(l, 'mechanic_id', False)
-                          and l.mechanic_id.id == w.employee_id.id
-            )
-
+            # Solo lectura del ledger: lo alimenta el precommit de la transacción que paga la factura
             Entry = w.env['mechanic.commission.entry']
-            entries_to_keep = Entry.browse()
-
-            for line in inv_lines:
-                cph = (getattr(line.product_id.product_tmpl_id, 'service_cost_per_hour', 0.0) or 0.0)
-                hrs_req = (getattr(line.product_id.product_tmpl_id, 'service_hours_required', 0.0) or 0.0)
-                qty = line.quantity or 0.0
-                hrs = hrs_req * qty
-                payout = cph * hrs
-
-                vals_base = {
-                    'company_id': w.env.company.id,
-                    'employee_id': w.employee_id.id,
-                    'invoice_id': line.move_id.id,
-                    'invoice_line_id': line.id,
-                    'invoice_name': f'{line.move_id.name or line.move_id.payment_reference or ""} - {line.move_id.partner_id.display_name}',
-                    'invoice_date': line.move_id.invoice_date,
-                    'product_id': line.product_id.id,
-                    'product_name': line.product_id.display_name,
-                    'quantity': qty,
-                    'hours': hrs,
-                    'subtotal_customer': line.price_subtotal,
-                    'payout': payout,
-                    'cost_per_hour': cph,
-                    'currency_id': line.currency_id.id or w.env.company.currency_id.id,
-                    'month': str(month).zfill(2),
-                    'year': str(year),
-                }
+            entries = Entry.search(w._entries_domain(), order='invoice_date asc, id asc', limit=LINES_PAGE_SIZE)
 
-                entry = Entry.search([
-                    ('employee_id', '=', w.employee_id.id),
-                    ('invoice_line_id', '=', line.id)
-                ], limit=1)
-                if entry:
-                    entry.write(vals_base)
-                else:
-                    entry = Entry.create(vals_base)
-
-                entries_to_keep |= entry
-
-            # Construir comandos (aplicando filtro si corresponde)
-            # Construir comandos (aplicando filtro si corresponde)
-            lines_cmds = [
-                (0, 0, {
-                    'commission_entry_id': e.id,  # <-- solo esto
-                })
-                for e in entries_to_keep.sorted(lambda r: (r.invoice_date or fields.Date.today(), r.id))
-            ]
-
-            if w.report_paid_filter == 'paid':
-                lines_cmds = [cmd for cmd in lines_cmds if cmd and cmd[2] and
-                            w.env['mechanic.commission.entry'].browse(cmd[2]['commission_entry_id']).is_paid]
-            elif w.report_paid_filter == 'unpaid':
-                lines_cmds = [cmd for cmd in lines_cmds if cmd and cmd[2] and
-                            not w.env['mechanic.commission.entry'].browse(cmd[2]['commission_entry_id']).is_paid]
+            lines_cmds = [(0, 0, {'commission_entry_id': e.id}) for e in entries]
 
             w.line_ids = [(5, 0, 0)] + lines_cmds
 
         # No llamamos _compute_totals aquí; el cliente lo pedirá al reabrir el form
 
     @api.onchange('report_paid_filter')
+    @profiled
     def _onchange_report_paid_filter(self):
         self._onchange_build_lines()
 
+    @profiled
+    def action_open_entries(self):
+        """Lista paginada (orden y filtros en SQL) de todos los servicios del periodo."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Servicios de %s (%s)' % (self.employee_id.name or '', self._get_period_label()),
+            'res_model': 'mechanic.commission.entry',
+            'view_mode': 'tree',
+            'views': [(self.env.ref('crm_commission.view_mechanic_commission_entry_pay_tree').id, 'tree')],
+            'search_view_id': self.env.ref('crm_commission.view_mechanic_commission_entry_search').id,
+            'domain': self._entries_domain(paid_filter=False),
+            'context': {
+                'search_default_filter_paid': self.report_paid_filter == 'paid',
+                'search_default_filter_unpaid': self.report_paid_filter == 'unpaid',
+            },
+            'target': 'current',
+        }
+
+    # Reconcilia el ledger del mecánico/mes con las facturas (consulta SQL directa)
+    @profiled
+    def action_resync_period(self):
+        self.ensure_one()
+        date_start, date_end = self._get_period_bounds()
+        _entries, stats = self.env['mechanic.commission.entry']._sync_employee_period(
+            self.employee_id, date_start, date_end,
+        )
+        self._onchange_build_lines()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Periodo resincronizado',
+                'message': 'Nuevas: %(inserted)s, actualizadas: %(updated)s, sin cambios: %(unchanged)s.' % stats,
+                'sticky': False,
+            }
+        }
+
+    @profiled
     def action_mark_all_paid(self):
         self.ensure_one()
-        entries = self.line_ids.mapped('commission_entry_id')
+        # Sin el filtro de pago del reporte: con 'Pagadas' el dominio sería contradictorio
+        entries = self.env['mechanic.commission.entry'].search(
+            self._entries_domain(paid_filter=False) + [('is_paid', '=', False)]
+        )
         if not entries:
             return {
                 'type': 'ir.actions.client',
@@ -430,52 +638,19 @@ class MechanicCommissionWizardLine(models.TransientModel):
     # Estado de pago (editable)
     is_paid = fields.Boolean(string='Pagado', related='commission_entry_id.is_paid', readonly=False)
 
-    # Metadata pago (solo lectura aquí, se setea al escribir)
+    # Metadata pago (solo lectura aquí; la sella mechanic.commission.entry.write)
     paid_date = fields.Datetime(related='commission_entry_id.paid_date', readonly=True)
     paid_by = fields.Many2one('res.users', related='commission_entry_id.paid_by', readonly=True)
 
     # Forma de pago (editable, persiste en entry)
     pago_comision = fields.Selection(
-        [('efect', 'Efectivo'), ('trans', 'Transferencia')],
+        PAYMENT_METHODS,
         string='Forma de pago',
         related='commission_entry_id.pago_comision',
         readonly=False,
         store=False,
     )
 
-    def write(self, vals):
-        res = super().write(vals)
-        for line in self:
-            entry = line.commission_entry_id
-            if not entry:
-                continue
-
-            # Toggle desde check
-            if 'is_paid' in vals:
-                if vals['is_paid']:
-                    entry.write({
-                        'is_paid': True,
-                        'paid_date': fields.Datetime.now(),
-                        'paid_by': self.env.user.id,
-                        **({} if entry.pago_comision else {'pago_comision': 'efect'}),
-                    })
-                else:
-                    entry.write({
-                        'is_paid': False,
-                        'paid_date': False,
-                        'paid_by': False,
-                    })
-
-            # Elegir forma de pago => marcar pagado + metadata
-            if 'pago_comision' in vals and vals['pago_comision']:
-                entry.write({
-                    'pago_comision': vals['pago_comision'],
-                    'is_paid': True,
-                    'paid_date': fields.Datetime.now(),
-                    'paid_by': self.env.user.id,
-                })
-        return res
-
 
 class MechanicCommissionMassPayWizard(models.TransientModel):
     _name = 'mechanic.commission.mass.pay.wizard'
@@ -490,24 +665,30 @@ class MechanicCommissionMassPayWizard(models.TransientModel):
         required=True,
     )
     pago_comision = fields.Selection(
-        [('efect', 'Efectivo'), ('trans', 'Transferencia')],
+        PAYMENT_METHODS,
         string='Forma de pago',
         required=True
     )
     paid_date = fields.Datetime(string='Fecha y hora de pago', default=lambda self: fields.Datetime.now())
     pay_note = fields.Char(string='Nota (opcional)')
 
+    @profiled
     def action_confirm(self):
         self.ensure_one()
-        vals = {
-            'is_paid': True,
-            'pago_comision': self.pago_comision,
-            'paid_date': self.paid_date,
-            'paid_by': self.env.user.id,
-        }
-        if self.pay_note:
-            vals['pay_note'] = self.pay_note
-        self.entry_ids.write(vals)
+        # Una sola sentencia: solo toca los no pagados y deja un lote en la bitácora
+        self.entry_ids._bulk_mark_paid(self.pago_comision, self.paid_date, self.pay_note)
+
+        run_id = self.env.context.get('parent_run_id')
+        if run_id:
+            run = self.env['mechanic.commission.run'].browse(run_id)
+            run._refresh_lines()
+            return {
+                'type': 'ir.actions.act_window',
+                'res_model': 'mechanic.commission.run',
+                'res_id': run.id,
+                'view_mode': 'form',
+                'target': 'current',
+            }
 
         parent_id = self.env.context.get('parent_wizard_id')
         if parent_id: